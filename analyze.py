@@ -0,0 +1,139 @@
+import argparse
+import collections
+import fileinput
+import json
+import multiprocessing
+import sys
+import time
+
+from engine import ChessBoard, GameRecord, GobangAI, MP_SIZE, SEARCH_DEPTH, read_games
+
+GAME_TT_MEMORY = 16 * 1024 * 1024  # bytes of the transposition table of each game, allocated per line
+BOARDS = {}  # chessboard of each size in this process, cleared between lines as setting one up costs more than a line
+
+
+# empty chessboard, with a static-only GobangAI that may be reused as well
+def get_board(size):
+    if size not in BOARDS:
+        chessBoard = ChessBoard(size)
+        BOARDS[size] = chessBoard, GobangAI(chessBoard, ttMemory=1, threats=False)
+    chessBoard, AI = BOARDS[size]
+    while len(chessBoard.chessList) > 0:
+        chessBoard.undo_chess()
+    return chessBoard, AI
+
+
+# "7,7 8,8 6,8" -> [(7, 7), (8, 8), (6, 8)]
+def parse_moves(text):
+    moves = []
+    for item in text.replace(';', ' ').split():
+        x, y = item.split(',')
+        moves.append((int(x), int(y)))
+    return moves
+
+
+# evaluations of one game, a move list line or a GameRecord: every position of it, or only the last one
+def analyze_line(job):
+    index, game, options = job
+    if isinstance(game, GameRecord):
+        size, blackFirst, moves = game.size, game.blackFirst, game.moves
+    else:
+        size, blackFirst = options['size'], 1
+        try:
+            moves = parse_moves(game)
+        except ValueError:
+            return [{'line': index, 'error': 'bad move list'}]
+    chessBoard, AI = get_board(size)
+    chessBoard.blackFirst = blackFirst
+    if not options['static']:  # a fresh search for each game, whichever process it lands on
+        AI = GobangAI(chessBoard, ttMemory=options['ttMemory'])
+    results = []
+    for ply, (x, y) in enumerate(moves, 1):
+        if not (0 <= x < size and 0 <= y < size) or chessBoard.board[x][y] != 0:
+            results.append({'line': index, 'ply': ply, 'error': 'illegal move %d,%d' % (x, y)})
+            break
+        chessBoard.put_chess(x, y)
+        if options['positions'] and ply < len(moves):
+            continue
+        results.append(analyze_position(AI, index, ply, 3 - chessBoard.board[x][y], options))
+        if 'winner' in results[len(results) - 1]:
+            break
+    return results
+
+
+def analyze_position(AI, index, ply, chessType, options):
+    result = {'line': index, 'ply': ply}
+    startTime = time.time()
+    chessCombination = AI.compute_chess_combination(chessType, 3 - chessType)
+    for side in (1, 2):
+        if chessCombination[side - 1][AI.CHESS_FIVE] > 0:
+            result['winner'] = side
+            return result
+    if len(AI.chessBoard.chessList) == AI.chessBoard.size * AI.chessBoard.size:  # nothing left to search
+        result['draw'] = True
+        return result
+    if options['static']:
+        result.update(score=AI.get_score(chessType, 3 - chessType), depth=0, nodes=0)
+    else:
+        score, x, y = AI.think(chessType, options['depth'], options['time'])
+        result.update(x=x, y=y, score=score, depth=AI.finishedDepth, nodes=AI.nodes)
+    result['seconds'] = round(time.time() - startTime, 6)
+    return result
+
+
+# (line number, text) of every non-blank input line, or (game number, GameRecord) of record files, read lazily
+def read_jobs(inputs, options):
+    if options['records']:
+        index = 0
+        for path in inputs:
+            for record in read_games(path):
+                index += 1
+                yield index, record, options
+        return
+    with fileinput.input(inputs) as lines:
+        for index, text in enumerate(lines, 1):
+            text = text.strip()
+            if text != '' and not text.startswith('#'):
+                yield index, text, options
+
+
+# results in input order, with at most pending lines read ahead of the one being written
+def run(jobs, workers, pending):
+    if workers <= 1:
+        for job in jobs:
+            yield analyze_line(job)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        queue = collections.deque()
+        for job in jobs:  # Pool.imap would read the whole input ahead
+            queue.append(pool.apply_async(analyze_line, (job,)))
+            if len(queue) >= pending:
+                yield queue.popleft().get()
+        while len(queue) > 0:
+            yield queue.popleft().get()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate the positions of many games, one game per line')
+    parser.add_argument('inputs', nargs='*', default=['-'], help='files of move lists like "7,7 8,8 6,8", or -')
+    parser.add_argument('--output', help='JSON lines written in input order, stdout by default')
+    parser.add_argument('--records', action='store_true', help='inputs are game record files, as logged by selfplay.py')
+    parser.add_argument('--positions', action='store_true', help='only the last position of each line')
+    parser.add_argument('--static', action='store_true', help='static score only, no search')
+    parser.add_argument('--depth', type=int, default=SEARCH_DEPTH)
+    parser.add_argument('--time', type=float, help='seconds per position, searching up to --depth')
+    parser.add_argument('--size', type=int, default=MP_SIZE)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--pending', type=int, help='lines in flight, 4 per worker by default')
+    parser.add_argument('--tt-memory', type=int, default=GAME_TT_MEMORY)
+    args = parser.parse_args()
+    options = {'records': args.records, 'size': args.size, 'positions': args.positions, 'static': args.static,
+               'depth': args.depth, 'time': args.time, 'ttMemory': args.tt_memory}
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+    try:
+        for results in run(read_jobs(args.inputs, options), args.workers, args.pending or args.workers * 4):
+            for result in results:
+                output.write(json.dumps(result) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+
+from engine import ChessBoard, GobangAI, MP_SIZE, DIRECTIONS, SEARCH_DEPTH
+
+# fixed positions as move lists from an empty chessboard, black first
+CORPUS = {
+    'opening-1': [(7, 7)],
+    'opening-2': [(7, 7), (8, 8), (6, 8)],
+    'opening-3': [(7, 7), (7, 8), (8, 7), (6, 6), (9, 6)],
+    'middlegame-1': [(7, 7), (7, 8), (8, 8), (6, 6), (8, 7), (8, 6), (9, 8), (6, 8), (9, 7)],
+    'middlegame-2': [(7, 7), (8, 8), (6, 8), (8, 6), (8, 7), (6, 7), (7, 9), (9, 7), (7, 6), (7, 8)],
+    'middlegame-3': [(7, 7), (6, 6), (8, 6), (6, 8), (6, 7), (8, 8), (7, 5), (9, 7), (5, 8), (9, 9), (10, 10)],
+    # black has a live three and white must answer
+    'tactical-1': [(7, 7), (6, 6), (7, 8), (8, 9), (7, 9), (5, 5)],
+    # black can make a four and a live three at once
+    'tactical-2': [(7, 7), (6, 7), (8, 8), (6, 8), (9, 9), (10, 10), (7, 9), (5, 6), (7, 10), (4, 5)],
+    # both sides hold fours and threes around the center
+    'tactical-3': [(7, 7), (7, 8), (8, 7), (8, 8), (6, 7), (9, 8), (6, 6), (6, 8), (5, 5), (4, 4),
+                   (9, 7), (4, 5)],
+}
+SUITE_OPTIONS = {'threats': 0}  # the threat solver settles the tactical positions before any node is searched
+NEAR_FULL_CHESS = 180  # chess on the generated near-full chessboards
+NEAR_FULL_SEEDS = [1, 2]
+
+
+def has_five(board, x, y):
+    size = len(board)
+    for dir_x, dir_y in DIRECTIONS:
+        count = 1
+        for sign in (1, -1):
+            u, v = x + sign * dir_x, y + sign * dir_y
+            while 0 <= u < size and 0 <= v < size and board[u][v] == board[x][y]:
+                count += 1
+                u, v = u + sign * dir_x, v + sign * dir_y
+        if count >= 5:
+            return True
+    return False
+
+
+# random chess over the whole chessboard, skipping any cell that would end the game
+def near_full_moves(seed, count):
+    rand = random.Random(seed)
+    cells = [(x, y) for x in range(MP_SIZE) for y in range(MP_SIZE)]
+    rand.shuffle(cells)
+    chessBoard = ChessBoard(MP_SIZE)
+    for x, y in cells:
+        if len(chessBoard.chessList) == count:
+            break
+        chessBoard.put_chess(x, y)
+        if has_five(chessBoard.board, x, y):
+            chessBoard.undo_chess()
+    return list(chessBoard.chessList)
+
+
+def get_corpus():
+    corpus = dict(CORPUS)
+    for seed in NEAR_FULL_SEEDS:
+        corpus['nearfull-%d' % seed] = near_full_moves(seed, NEAR_FULL_CHESS)
+    return corpus
+
+
+def load_position(moves, size=MP_SIZE):
+    chessBoard = ChessBoard(size)
+    for x, y in moves:
+        chessBoard.put_chess(x, y)
+    u, v = chessBoard.chessList[len(chessBoard.chessList) - 1]
+    return chessBoard, 3 - chessBoard.board[u][v]
+
+
+# best seconds per call of the evaluation parts, each on its own
+def time_parts(moves, repeat):
+    chessBoard, chessType = load_position(moves)
+    AI = GobangAI(chessBoard)
+    AI.reset_combination()
+    AI.get_search_order(chessType, 3 - chessType)  # builds the lazy pattern tables first
+    parts = {
+        'compute_chess_combination': lambda: AI.compute_chess_combination(chessType, 3 - chessType),
+        'get_score': lambda: AI.get_score(chessType, 3 - chessType),
+        'get_search_order': lambda: AI.get_search_order(chessType, 3 - chessType),
+    }
+    results = {}
+    for name, part in parts.items():
+        timer = timeit.Timer(part)
+        number, seconds = timer.autorange()
+        results[name] = min(timer.repeat(repeat, number)) / number
+    return results
+
+
+# best seconds and nodes of a whole think(), each run with a fresh GobangAI
+def time_think(moves, depth, repeat, options, size=MP_SIZE):
+    seconds = None
+    for run in range(repeat):
+        chessBoard, chessType = load_position(moves, size)
+        AI = GobangAI(chessBoard, **options)
+        startTime = time.time()
+        AI.think(chessType, depth)
+        runSeconds = time.time() - startTime
+        seconds = runSeconds if seconds is None else min(seconds, runSeconds)
+    return {'seconds': seconds, 'nodes': AI.nodes, 'nps': AI.nodes / seconds if seconds > 0 else 0}
+
+
+def run_suite(maxDepth, repeat, options):
+    results = {}
+    for name, moves in get_corpus().items():
+        for part, seconds in time_parts(moves, repeat).items():
+            results['%s/%s' % (part, name)] = {'seconds': seconds}
+        for depth in range(1, maxDepth + 1):
+            results['think-%d/%s' % (depth, name)] = time_think(moves, depth, repeat, options)
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'time': time.time(),
+            'options': options, 'results': results}
+
+
+# names of results slower than baseline by more than threshold (0.1 is 10%)
+def compare(report, baseline, threshold):
+    regressions = []
+    for name, result in sorted(report['results'].items()):
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        change = result['seconds'] / old['seconds'] - 1 if old['seconds'] > 0 else 0
+        print('%-45s %10.6f s %+7.1f%%' % (name, result['seconds'], change * 100))
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+# time until the main search finishes the given depth, helper processes started beforehand
+def time_to_depth(workers, depth):
+    names = ['middlegame-1', 'middlegame-2', 'middlegame-3']
+    total = 0
+    for name in names:
+        chessBoard, chessType = load_position(CORPUS[name])
+        AI = GobangAI(chessBoard, workers=workers)
+        startTime = time.time()
+        AI.think(chessType, depth)
+        total += time.time() - startTime
+        AI.close()
+    return total / len(names)
+
+
+# per-move seconds and nodes of the fixed positions moved to the center of each chessboard size, same depth
+def time_sizes(sizes, depth, repeat):
+    results = {}
+    for size in sizes:
+        shift = (size - MP_SIZE) // 2
+        for name, moves in CORPUS.items():
+            results[size, name] = time_think([(x + shift, y + shift) for x, y in moves], depth, repeat, {}, size)
+    return results
+
+
+# seconds for a fresh interpreter to import the engine and set up a game, best of some runs
+def startup_time(runs):
+    code = 'import engine; engine.Engine()'
+    directory = os.path.dirname(os.path.abspath(__file__))  # where engine.py is found, wherever this was started
+    best = None
+    for run in range(runs):
+        startTime = time.time()
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=directory)
+        seconds = time.time() - startTime
+        best = seconds if best is None else min(best, seconds)
+    emptyStart = time.time()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True, cwd=directory)
+    return best, time.time() - emptyStart
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Engine benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+    suite = commands.add_parser('suite', help='evaluation parts and think() on a fixed corpus')
+    suite.add_argument('--max-depth', type=int, default=4)
+    suite.add_argument('--repeat', type=int, default=5)
+    suite.add_argument('--output', default='benchmark.json', help='machine-readable results')
+    suite.add_argument('--baseline', help='results saved before, to compare with')
+    suite.add_argument('--threshold', type=float, default=0.1, help='slowdown counted as a regression')
+    suite.add_argument('--set', action='append', default=[], metavar='OPTION=VALUE',
+                       help='GobangAI option for think(), e.g. pvs=0, aspiration=1 or threats=1')
+    smp = commands.add_parser('smp', help='Lazy SMP time-to-depth scaling')
+    smp.add_argument('--workers', type=int, default=4, help='measure 1 to this many processes')
+    smp.add_argument('--depth', type=int, default=4)
+    sizes = commands.add_parser('sizes', help='per-move latency on larger chessboards at equal depth')
+    sizes.add_argument('--sizes', default='15,19,20')
+    sizes.add_argument('--depth', type=int, default=SEARCH_DEPTH)
+    sizes.add_argument('--repeat', type=int, default=3)
+    startup = commands.add_parser('startup', help='engine process startup time')
+    startup.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    if args.command == 'suite':
+        options = dict(SUITE_OPTIONS)
+        options.update((name, int(value)) for name, value in (item.split('=') for item in args.set))
+        report = run_suite(args.max_depth, args.repeat, options)
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=1, sort_keys=True)
+        if args.baseline:
+            with open(args.baseline) as baseline:
+                regressions = compare(report, json.load(baseline), args.threshold)
+            if regressions:
+                print('regressions: ' + ', '.join(regressions))
+                sys.exit(1)
+        else:
+            for name, result in sorted(report['results'].items()):
+                print('%-45s %10.6f s' % (name, result['seconds'])
+                      + ('  %6d nodes %8.0f nodes/s' % (result['nodes'], result['nps']) if 'nodes' in result else ''))
+    elif args.command == 'smp':
+        baseline = None
+        print('workers  seconds  speedup')
+        for workers in range(1, args.workers + 1):
+            seconds = time_to_depth(workers, args.depth)
+            baseline = baseline or seconds
+            print('%7d  %7.2f  %7.2f' % (workers, seconds, baseline / seconds))
+    elif args.command == 'sizes':
+        sizeList = [int(size) for size in args.sizes.split(',')]
+        results = time_sizes(sizeList, args.depth, args.repeat)
+        print('size  seconds/move    nodes  nodes/s')
+        for size in sizeList:
+            moves = [result for (resultSize, name), result in results.items() if resultSize == size]
+            seconds = sum(result['seconds'] for result in moves)
+            nodes = sum(result['nodes'] for result in moves)
+            print('%4d  %12.3f  %7d  %7.0f' % (size, seconds / len(moves), nodes, nodes / seconds))
+    elif args.command == 'startup':
+        seconds, interpreter = startup_time(args.runs)
+        print('engine startup: %.3f s (bare interpreter: %.3f s)' % (seconds, interpreter))
@@ -0,0 +1,77 @@
+import argparse
+import multiprocessing
+import time
+
+from engine import ChessBoard, Engine, MP_SIZE, BOOK_FILE, write_book
+
+
+# best move of one position by a deep search, and the moves worth following from it
+def search_position(job):
+    moves, size, depth, width = job
+    engine = Engine(size)
+    engine.set_position(moves)
+    chessType = engine.side_to_move()
+    key, symmetry = engine.chessBoard.get_canonical()  # one entry for all rotations and reflections
+    key ^= engine.AI.zobristSide[chessType]
+    result = engine.search(depth)
+    children = [(result.x, result.y)]
+    if abs(result.score) < 100000:  # else the game is decided, nothing to follow
+        for weight, x, y in engine.AI.get_search_order(chessType, 3 - chessType):
+            if len(children) >= width:
+                break
+            if (x, y) not in children:
+                children.append((x, y))
+    engine.close()
+    x, y = engine.chessBoard.transform(result.x, result.y, symmetry)
+    return key, moves, (x, y, result.score), children
+
+
+# the same for every move order, rotation and reflection of a position
+def get_position_key(chessBoard, moves):
+    for x, y in moves:
+        chessBoard.put_chess(x, y)
+    key = chessBoard.get_canonical()[0]
+    for move in moves:
+        chessBoard.undo_chess()
+    return key
+
+
+# the openings of the game: one chess put on the 3x3 center at random, then the width most likely moves each ply
+def build_book(size, plies, depth, width, workers):
+    center = [(x, y) for x in range(size // 2 - 1, size // 2 + 2) for y in range(size // 2 - 1, size // 2 + 2)]
+    positions = [[cell] for cell in center[:2] + center[4:5]]  # the other cells are rotations of these
+    entries = {}
+    chessBoard = ChessBoard(size)
+    with multiprocessing.Pool(workers) as pool:
+        for ply in range(plies):
+            startTime = time.time()
+            nextPositions, seen = [], set()
+            for key, moves, best, children in pool.imap_unordered(search_position,
+                                                                  [(moves, size, depth, width) for moves in positions]):
+                if key in entries:  # reached by another move order, or a rotation or reflection of it
+                    continue
+                entries[key] = [best]
+                for child in children:
+                    position = moves + [child]
+                    positionKey = get_position_key(chessBoard, position)
+                    if positionKey not in seen:
+                        seen.add(positionKey)
+                        nextPositions.append(position)
+            print('ply %d: %d positions in %.1f s, %d in the book' %
+                  (ply + 1, len(positions), time.time() - startTime, len(entries)), flush=True)
+            positions = nextPositions
+    return entries
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the opening book by deep searching the common openings')
+    parser.add_argument('--output', default=BOOK_FILE)
+    parser.add_argument('--size', type=int, default=MP_SIZE)
+    parser.add_argument('--plies', type=int, default=3, help='book positions after this many moves at most')
+    parser.add_argument('--depth', type=int, default=5, help='search depth of every book position')
+    parser.add_argument('--width', type=int, default=3, help='moves followed from every position')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+    entries = build_book(args.size, args.plies, args.depth, args.width, args.workers)
+    write_book(args.output, args.size, entries)
+    print('%d positions written to %s' % (len(entries), args.output))
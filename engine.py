@@ -0,0 +1,1825 @@
+import collections
+import mmap
+import os
+import random
+import struct
+import time
+
+numpy = None  # optional, imported on first batched move ordering by load_numpy
+
+MP_SIZE = 15
+DIRECTIONS = [(0, 1), (1, -1), (1, 0), (1, 1)]
+LINE_KEY_BITS = 5  # low bits of a line key hold the line length
+MAX_SIZE = (1 << LINE_KEY_BITS) - 1  # longest line a line key holds
+LINE_PADDING = 4  # cells beyond each end of a decoded line, as far as the line classifier looks
+EDGE = 3  # padding cell
+EMPTY_COMBINATION = (0, 0, 0, 0, 0, 0, 0, 0)
+PATTERN_TABLE_SIZE = 1 << 20  # classified lines kept before the pattern tables are cleared
+SEARCH_DEPTH = 3
+SEARCH_RADIUS = 2  # candidate moves are empty cells within this distance of a chess
+MAX_SEARCH_DEPTH = 10  # deepest iteration when thinking with a time limit
+ZOBRIST_SEED = 20200
+TT_MEMORY = 64 * 1024 * 1024  # bytes the transposition table may use
+ASPIRATION_WINDOW = 200  # half width of the first root window
+KILLER_WEIGHT = 1000  # moves with a static score this high are threats, searched before killer moves
+THREAT_DEPTH = 12  # attacker moves a threat sequence may take
+THREAT_NODES = 4000  # positions one threat search may visit
+THREAT_TIME = 0.5  # seconds one threat search may take
+THREAT_SHARE = 0.25  # part of a think() time limit the threat searches may take together
+THREAT_CACHE_SIZE = 1 << 16  # solved positions kept before the threat cache is cleared
+PATTERN_ENTRY_SIZE = 512  # approximate bytes of one line in both pattern tables
+THREAT_ENTRY_SIZE = 256  # approximate bytes of one threat cache entry
+PONDER_REPLIES = 3  # likely replies searched while the other side thinks
+CACHE_SIZE = 1 << 20  # positions the on-disk cache keeps, the shallowest are dropped beyond that
+CACHE_BATCH = 64  # positions written to disk at once
+CACHE_MIN_DEPTH = 4  # searches at least this deep are worth keeping on disk
+CACHE_PLIES = 1  # plies below the root that read the on-disk cache
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'opening.book')  # made by book.py
+BOOK_MAGIC = b'GBK2'
+BOOK_HEADER = struct.Struct('<4sHI')  # magic, chessboard size, entry count
+BOOK_ENTRY = struct.Struct('<QBBi')  # canonical key, x, y, score; sorted by key, best move first
+RECORD_MAGIC = b'GGR1'
+RECORD_HEADER = struct.Struct('<BBBH')  # chessboard size, blackFirst, winner or 0, move count; the moves follow
+SCORE_WEIGHTS = {  # positional part of compute_score, GobangAI(weights=...) may override any of them
+    'playerDeathFour': 400,
+    'liveThree': 100,
+    'doubleLiveThree': 500,
+    'playerLiveThree': 400,
+    'playerDoubleLiveThree': 2000,
+    'deathThree': 10,
+    'liveTwo': 6,
+    'deathTwo': 2,
+}
+
+
+# numpy is slow to import, so processes that never order moves in batch don't pay for it
+def load_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+    return True
+
+
+# bound the pattern tables and the threat cache of every GobangAI to about memory bytes together
+def limit_tables(memory):
+    global PATTERN_TABLE_SIZE, THREAT_CACHE_SIZE
+    PATTERN_TABLE_SIZE = max(memory * 3 // 4 // PATTERN_ENTRY_SIZE, 1024)
+    THREAT_CACHE_SIZE = max(memory // 4 // THREAT_ENTRY_SIZE, 1024)
+
+
+# cells of every row, column and diagonal in board scan order, and (line id, position on line) of each cell
+def get_lines(size):
+    lines = []
+    cellLines = [[[] for x in range(size)] for y in range(size)]  # indexed by direction
+    for dir_x, dir_y in DIRECTIONS:
+        for x in range(size):
+            for y in range(size):
+                if 0 <= x - dir_x < size and 0 <= y - dir_y < size:
+                    continue  # not the first cell of a line
+                line, u, v = [], x, y
+                while 0 <= u < size and 0 <= v < size:
+                    cellLines[u][v].append((len(lines), len(line)))
+                    line.append((u, v))
+                    u, v = u + dir_x, v + dir_y
+                lines.append(line)
+    return lines, cellLines
+
+
+# each cell under the 8 rotations and reflections of the chessboard: cells[x][y][t] is where t moves (x, y)
+def get_symmetry_cells(size):
+    n = size - 1
+    rotations = [lambda x, y: (x, y), lambda x, y: (y, n - x), lambda x, y: (n - x, n - y), lambda x, y: (n - y, x)]
+    cells = [[[] for y in range(size)] for x in range(size)]
+    for x in range(size):
+        for y in range(size):
+            for flip in (False, True):
+                for rotation in rotations:
+                    cells[x][y].append(rotation(x, n - y) if flip else rotation(x, y))
+    return cells
+
+
+# t followed by SYMMETRY_INVERSE[t] leaves every cell in place
+SYMMETRY_INVERSE = [0, 3, 2, 1, 4, 5, 6, 7]
+
+
+# black bits, white bits and length of a line packed in one integer, the same for every chessboard backend
+def get_line_key(black, white, length):
+    return (white << length | black) << LINE_KEY_BITS | length
+
+
+def decode_line_key(key):
+    length = key & ((1 << LINE_KEY_BITS) - 1)
+    black, white = key >> LINE_KEY_BITS, key >> (LINE_KEY_BITS + length)
+    return [(black >> i & 1) | (white >> i & 1) << 1 for i in range(length)]
+
+
+# the same line with EDGE cells on both sides, so that the classifier needs no bounds test
+def decode_padded_line(key):
+    return bytearray([EDGE] * LINE_PADDING + decode_line_key(key) + [EDGE] * LINE_PADDING)
+
+
+class ChessBoard:
+    def __init__(self, size, black=1, radius=SEARCH_RADIUS):
+        if not 5 <= size <= MAX_SIZE:
+            raise ValueError('unsupported chessboard size: %d' % size)
+        self.size = size
+        self.board = [[0 for x in range(size)] for y in range(size)]
+        self.lines, self.cellLines = get_lines(size)
+        self.radius = radius
+        self.neighbors = [[[(u, v)
+                            for u in range(max(x - radius, 0), min(x + radius, size - 1) + 1)
+                            for v in range(max(y - radius, 0), min(y + radius, size - 1) + 1)
+                            if (u, v) != (x, y)]
+                           for y in range(size)]
+                          for x in range(size)]
+        self.nearCount = [[0 for x in range(size)] for y in range(size)]  # chess within radius of each cell
+        self.candidates = set()  # empty cells with nearCount > 0
+        self.chessList = []
+        self.blackFirst = black  # default: Black chess first according to human rules
+        rand = random.Random(ZOBRIST_SEED)  # fixed seed, so hashes are the same in every process
+        self.zobrist = [[[0, rand.getrandbits(64), rand.getrandbits(64)]
+                         for x in range(size)]
+                        for y in range(size)]
+        self.hash = 0
+        self.symmetryCells = get_symmetry_cells(size)
+        self.hashes = [0 for t in range(8)]  # hash of the chessboard as seen through each symmetry
+        self.stride = size + 2 * LINE_PADDING
+        self.cells = bytearray([EDGE]) * (self.stride * self.stride)  # board again, flat and row by row inside EDGE
+        for x in range(size):
+            self.cells[self.get_cell(x, 0):self.get_cell(x, size)] = bytes(size)
+
+    def get_cell(self, x, y):  # index of (x, y) in cells
+        return (x + LINE_PADDING) * self.stride + y + LINE_PADDING
+
+    def set_chess(self, x, y, chessType):  # Change one cell, keeping Zobrist hashes and candidates up to date
+        oldType = self.board[x][y]
+        self.hash ^= self.zobrist[x][y][oldType] ^ self.zobrist[x][y][chessType]
+        hashes = self.hashes
+        for t, (u, v) in enumerate(self.symmetryCells[x][y]):
+            hashes[t] ^= self.zobrist[u][v][oldType] ^ self.zobrist[u][v][chessType]
+        self.board[x][y] = chessType
+        self.cells[(x + LINE_PADDING) * self.stride + y + LINE_PADDING] = chessType
+        if oldType == 0 and chessType != 0:
+            self.candidates.discard((x, y))
+            for u, v in self.neighbors[x][y]:
+                self.nearCount[u][v] += 1
+                if self.nearCount[u][v] == 1 and self.board[u][v] == 0:
+                    self.candidates.add((u, v))
+        elif oldType != 0 and chessType == 0:
+            for u, v in self.neighbors[x][y]:
+                self.nearCount[u][v] -= 1
+                if self.nearCount[u][v] == 0:
+                    self.candidates.discard((u, v))
+            if self.nearCount[x][y] > 0:
+                self.candidates.add((x, y))
+
+    def get_line(self, lineId):  # chess on one line, in the order of chessBoard.lines
+        return [self.board[x][y] for x, y in self.lines[lineId]]
+
+    # (hash, t): the same for every rotation and reflection of a position, t turning it into the canonical one
+    def get_canonical(self):
+        key = min(self.hashes)
+        return key, self.hashes.index(key)
+
+    # symmetries other than the identity that leave the position as it is
+    def get_symmetries(self):
+        return [t for t in range(1, 8) if self.hashes[t] == self.hash]
+
+    def transform(self, x, y, t):
+        return self.symmetryCells[x][y][t]
+
+    def untransform(self, x, y, t):
+        return self.symmetryCells[x][y][SYMMETRY_INVERSE[t]]
+
+    def get_line_key(self, lineId):
+        black, white = 0, 0
+        for i, (x, y) in enumerate(self.lines[lineId]):
+            if self.board[x][y] == 1:
+                black |= 1 << i
+            elif self.board[x][y] == 2:
+                white |= 1 << i
+        return get_line_key(black, white, len(self.lines[lineId]))
+
+    def put_chess(self, x, y):  # Just put chess on chessboard
+        if len(self.chessList) > 0:
+            u, v = self.chessList[len(self.chessList) - 1]
+            self.set_chess(x, y, 3 - self.board[u][v])  # Black: 1; White: 2; Empty: 0
+        else:
+            self.set_chess(x, y, self.blackFirst)
+        self.chessList.append((x, y))
+
+    def undo_chess(self):
+        if len(self.chessList) > 0:
+            u, v = self.chessList[len(self.chessList) - 1]
+            self.chessList.pop(len(self.chessList) - 1)
+            self.set_chess(u, v, 0)
+
+    # replace the game by moves from an empty chessboard, without checking them
+    def replay(self, moves, blackFirst=None):
+        while len(self.chessList) > 0:
+            self.undo_chess()
+        if blackFirst is not None:
+            self.blackFirst = blackFirst
+        chessType = self.blackFirst
+        for x, y in moves:
+            self.set_chess(x, y, chessType)
+            chessType = 3 - chessType
+        self.chessList.extend(moves)
+
+
+# same chessboard, also keeping every side as bitmasks in which each line is a run of consecutive bits
+class BitChessBoard(ChessBoard):
+    def __init__(self, size, black=1, radius=SEARCH_RADIUS):
+        ChessBoard.__init__(self, size, black, radius)
+        self.bits = [[0, 0, 0] for direction in range(len(DIRECTIONS))]  # bits[direction][chessType]
+        self.lineDirection = [0 for x in range(len(self.lines))]
+        for x in range(size):
+            for y in range(size):
+                for direction, (lineId, pos) in enumerate(self.cellLines[x][y]):
+                    self.lineDirection[lineId] = direction
+        self.lineShift = []  # where the line starts in the bitmask of its direction
+        self.lineMask = []
+        shift = [0 for direction in range(len(DIRECTIONS))]
+        for lineId, line in enumerate(self.lines):
+            direction = self.lineDirection[lineId]
+            self.lineShift.append(shift[direction])
+            self.lineMask.append((1 << len(line)) - 1)
+            shift[direction] += len(line)
+        self.cellBits = [[[1 << (self.lineShift[lineId] + pos) for lineId, pos in self.cellLines[x][y]]
+                          for y in range(size)]
+                         for x in range(size)]
+
+    def set_chess(self, x, y, chessType):
+        oldType = self.board[x][y]
+        ChessBoard.set_chess(self, x, y, chessType)
+        for direction, bit in enumerate(self.cellBits[x][y]):
+            if oldType != 0:
+                self.bits[direction][oldType] &= ~bit
+            if chessType != 0:
+                self.bits[direction][chessType] |= bit
+
+    def get_line_bits(self, lineId):  # (black, white) bitmasks of one line, bit i is position i
+        bits = self.bits[self.lineDirection[lineId]]
+        shift, mask = self.lineShift[lineId], self.lineMask[lineId]
+        return bits[1] >> shift & mask, bits[2] >> shift & mask
+
+    def get_line(self, lineId):
+        black, white = self.get_line_bits(lineId)
+        return [(black >> i & 1) | (white >> i & 1) << 1 for i in range(len(self.lines[lineId]))]
+
+    def get_line_key(self, lineId):
+        black, white = self.get_line_bits(lineId)
+        return get_line_key(black, white, len(self.lines[lineId]))
+
+
+# line key -> chess combination of both sides on that line, shared by every GobangAI
+LINE_PATTERNS = {}
+# line key and position -> chess combination of the chess at that position
+POINT_PATTERNS = {}
+
+
+class SearchTimeout(Exception):  # raised inside the search when time is up
+    pass
+
+
+# what one think() did, collected only by a GobangAI(collectStats=True)
+class SearchStats:
+    PHASES = ('patterns', 'scoring', 'ordering')
+
+    def __init__(self):
+        self.nodes = collections.Counter()  # max_min_search calls of each iteration depth
+        self.depthSeconds = {}  # time of each finished iteration depth
+        self.cutoffs = collections.Counter()  # beta cutoffs by index of the move that caused them
+        self.shortcuts = 0  # orderings cut down to the easy position moves
+        self.orderings = 0
+        self.candidates = 0  # moves returned by all the orderings
+        self.seconds = {phase: 0.0 for phase in SearchStats.PHASES}  # time spent in each phase
+        self.totalSeconds = 0.0
+        self.threatNodes = 0  # positions visited by the threat solver
+        self.researches = 0  # null-window and aspiration searches that had to be repeated
+
+    # plain data, e.g. for json.dumps
+    def as_dict(self):
+        return {'nodes': {str(depth): count for depth, count in sorted(self.nodes.items())},
+                'depthSeconds': {str(depth): seconds for depth, seconds in sorted(self.depthSeconds.items())},
+                'cutoffs': sum(self.cutoffs.values()),
+                'cutoffIndex': {str(index): count for index, count in sorted(self.cutoffs.items())},
+                'shortcuts': self.shortcuts,
+                'orderings': self.orderings,
+                'candidates': self.candidates,
+                'seconds': dict(self.seconds),
+                'totalSeconds': self.totalSeconds,
+                'threatNodes': self.threatNodes,
+                'researches': self.researches}
+
+    # wrap a bound method so that its time is added to one phase
+    def timed(self, phase, method):
+        seconds = self.seconds
+
+        def timed_method(*args):
+            startTime = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                seconds[phase] += time.perf_counter() - startTime
+        return timed_method
+
+
+class TranspositionTable:
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+    ENTRY_SIZE = 224  # bytes of one filled slot: its list pointer, the tuple, key, score and move, 216 by tracemalloc
+
+    def __init__(self, memory=TT_MEMORY):
+        self.size = max(memory // self.ENTRY_SIZE, 1)
+        self.table = [None] * self.size
+        self.generation = 0
+
+    # called before every search; entries of earlier searches become replaceable
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.table = [None] * self.size
+
+    # return (depth, score, flag, move) stored for key, or None
+    def get(self, key):
+        entry = self.table[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry[1:5]
+        return None
+
+    # replacement policy: keep the deeper entry unless the stored one is from an earlier search
+    def put(self, key, depth, score, flag, move):
+        index = key % self.size
+        entry = self.table[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.table[index] = (key, depth, score, flag, move, self.generation)
+
+
+# transposition table in shared memory, so search processes can use each other's results without locks
+class SharedTranspositionTable(TranspositionTable):
+    ENTRY_SIZE = 16  # two 64-bit words: key ^ data, data
+
+    def __init__(self, memory=TT_MEMORY, name=None):
+        from multiprocessing import shared_memory  # only parallel search needs it
+        self.size = max(memory // self.ENTRY_SIZE, 1)
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=self.size * self.ENTRY_SIZE)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)  # only the owner unlinks it
+        self.name = self.memory.name
+        self.table = self.memory.buf.cast('Q')
+        self.generation = 0
+
+    def clear(self):
+        self.memory.buf[:] = bytes(self.size * self.ENTRY_SIZE)
+
+    # an entry is used only if its two words agree, so a slot torn by two writers just looks empty
+    def get(self, key):
+        index = key % self.size * 2
+        check, data = self.table[index], self.table[index + 1]
+        if data == 0 or check ^ data != key:
+            return None
+        move = data >> 19 & 0x7ff
+        move = None if move == 0 else ((move - 1) >> 5, (move - 1) & 31)
+        return data >> 3 & 0xff, (data >> 30) - (1 << 32), data >> 1 & 3, move
+
+    def put(self, key, depth, score, flag, move):
+        index = key % self.size * 2
+        check, data = self.table[index], self.table[index + 1]
+        if data != 0 and check ^ data != key and data >> 11 & 0xff == self.generation & 0xff \
+                and depth < data >> 3 & 0xff:
+            return
+        move = 0 if move is None else (move[0] << 5 | move[1]) + 1
+        data = 1 | flag << 1 | min(depth, 0xff) << 3 | (self.generation & 0xff) << 11 | move << 19 \
+            | (score + (1 << 32)) << 30
+        self.table[index + 1] = data
+        self.table[index] = key ^ data
+
+    def close(self):
+        self.table.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+# body of a helper process: search the positions it is sent, reporting every finished depth
+def search_worker(index, size, tableName, tableMemory, jobs, results, stop):
+    transpositionTable = SharedTranspositionTable(tableMemory, tableName)
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        chessList, blackFirst, radius, chessType, depth, deadline, generation, options, rootMoves = job
+        chessBoard = ChessBoard(size, blackFirst, radius)
+        chessBoard.replay(chessList)
+        AI = GobangAI(chessBoard, transpositionTable=transpositionTable, **options)
+        AI.rootMoves = rootMoves  # the moves left by the threat solver of the main search
+        AI.stop = stop
+        AI.startDepth = 1 + index % 2  # helpers start at different depths
+        AI.helperRandom = random.Random(index)
+        AI.onDepth = lambda currentDepth, score, position: results.put((currentDepth, score, position))
+        transpositionTable.generation = generation
+        AI.reset_combination()
+        AI.iterative_search(chessType, depth, deadline)
+        results.put(None)
+    transpositionTable.close()
+
+
+# Lazy SMP: helper processes search the same root position and share one transposition table
+class ParallelSearch:
+    def __init__(self, size, helpers, transpositionTable):
+        import multiprocessing
+        self.results = multiprocessing.Queue()
+        self.stop = multiprocessing.Event()
+        self.jobs = [multiprocessing.Queue() for index in range(helpers)]
+        self.processes = [multiprocessing.Process(target=search_worker,
+                                                  args=(index + 1, size, transpositionTable.name,
+                                                        transpositionTable.size * transpositionTable.ENTRY_SIZE,
+                                                        self.jobs[index], self.results, self.stop),
+                                                  daemon=True)
+                          for index in range(helpers)]
+        for process in self.processes:
+            process.start()
+
+    def start(self, AI, chessType, depth, deadline):
+        self.stop.clear()
+        chessBoard = AI.chessBoard
+        for jobs in self.jobs:
+            jobs.put((chessBoard.chessList, chessBoard.blackFirst, chessBoard.radius, chessType, depth, deadline,
+                      AI.transpositionTable.generation, AI.get_options(), AI.rootMoves))
+
+    # stop the helpers and return (depth, score, position) of every depth they finished
+    def finish(self):
+        self.stop.set()
+        reports, running = [], len(self.processes)
+        while running > 0:
+            report = self.results.get()
+            if report is None:
+                running -= 1
+            else:
+                reports.append(report)
+        return reports
+
+    def close(self):
+        for jobs in self.jobs:
+            jobs.put(None)
+        for process in self.processes:
+            process.join()
+
+
+# search the likely replies of the other side in a background thread, sharing the transposition table,
+# so the search of the reply actually played is either done already or starts from a warm table
+class Ponder:
+    def __init__(self, AI, chessType, depth, replies):
+        import threading
+        chessBoard = AI.chessBoard
+        self.chessList = list(chessBoard.chessList)
+        self.board = type(chessBoard)(chessBoard.size, chessBoard.blackFirst, chessBoard.radius)
+        self.board.replay(self.chessList)
+        self.AI = GobangAI(self.board, transpositionTable=AI.transpositionTable, **AI.get_options())
+        self.stop = threading.Event()
+        self.AI.stop = self.stop
+        self.chessType = chessType
+        self.depth = depth
+        self.replies = replies
+        self.results = {}  # reply -> (depth, score, x, y) of a finished search
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        orders = self.AI.get_search_order(3 - self.chessType, self.chessType)
+        for weight, x, y in orders[:self.replies]:
+            if self.stop.is_set():
+                break
+            if self.AI.get_move_combination(x, y, 3 - self.chessType)[self.AI.CHESS_FIVE] > 0:
+                continue  # the game ends there
+            self.board.put_chess(x, y)
+            try:
+                score, u, v = self.AI.think(self.chessType, self.depth)
+                self.results[(x, y)] = (self.AI.finishedDepth, score, u, v)
+            except SearchTimeout:
+                break
+            finally:
+                self.board.undo_chess()
+
+    # stop pondering; the search result for chessList if it is a reply that was searched to the end
+    def finish(self, chessList):
+        self.stop.set()
+        self.thread.join()
+        if len(chessList) != len(self.chessList) + 1 or chessList[:len(self.chessList)] != self.chessList:
+            return None
+        return self.results.get(tuple(chessList[len(chessList) - 1]))
+
+
+# position key -> (depth, exact score, best move) kept in SQLite across processes and restarts;
+# WAL mode lets any number of processes read while one writes
+class PositionCache:
+    PROVEN = 255  # depth of wins proven by the threat solver, deeper than any search
+
+    def __init__(self, path, size=CACHE_SIZE, batch=CACHE_BATCH):
+        import sqlite3
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS positions '
+                                    '(key INTEGER PRIMARY KEY, depth INTEGER, score INTEGER, x INTEGER, y INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS positions_depth ON positions (depth)')
+        self.size = size
+        self.batch = batch
+        self.pending = {}  # written at the next flush
+
+    # SQLite integers are signed 64-bit
+    def get_row_key(self, key):
+        return key - (1 << 64) if key >= 1 << 63 else key
+
+    def get(self, key):
+        entry = self.pending.get(key)
+        if entry is not None:
+            return entry
+        row = self.connection.execute('SELECT depth, score, x, y FROM positions WHERE key = ?',
+                                      (self.get_row_key(key),)).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], (row[2], row[3])
+
+    def put(self, key, depth, score, move):
+        entry = self.pending.get(key)
+        if entry is None or depth >= entry[0]:
+            self.pending[key] = (depth, score, move)
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    # write pending positions, keeping the deeper result of each, then drop the shallowest beyond size
+    def flush(self):
+        if len(self.pending) == 0:
+            return
+        rows = [(self.get_row_key(key), depth, score, x, y) for key, (depth, score, (x, y)) in self.pending.items()]
+        self.pending = {}
+        with self.connection:
+            self.connection.executemany('INSERT INTO positions VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE '
+                                        'SET depth = excluded.depth, score = excluded.score, x = excluded.x, '
+                                        'y = excluded.y WHERE excluded.depth >= positions.depth', rows)
+            count = self.connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+            if count > self.size:
+                self.connection.execute('DELETE FROM positions WHERE key IN '
+                                        '(SELECT key FROM positions ORDER BY depth LIMIT ?)', (count - self.size,))
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+# position key -> best moves, binary-searched in place in a memory-mapped file
+class OpeningBook:
+    def __init__(self, path):
+        with open(path, 'rb') as bookFile:
+            self.data = mmap.mmap(bookFile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, self.count = BOOK_HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC:
+            self.data.close()
+            raise ValueError('not an opening book: ' + path)
+
+    def get_key(self, index):
+        return BOOK_ENTRY.unpack_from(self.data, BOOK_HEADER.size + index * BOOK_ENTRY.size)[0]
+
+    # [(x, y, score)] stored for key, best first
+    def get(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.count):
+            entryKey, x, y, score = BOOK_ENTRY.unpack_from(self.data, BOOK_HEADER.size + index * BOOK_ENTRY.size)
+            if entryKey != key:
+                break
+            moves.append((x, y, score))
+        return moves
+
+    def close(self):
+        self.data.close()
+
+
+# the book at path, or None if there is no such file
+def load_book(path=BOOK_FILE):
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+
+# write entries {key: [(x, y, score)], best first} as a book file
+def write_book(path, size, entries):
+    with open(path, 'wb') as bookFile:
+        bookFile.write(BOOK_HEADER.pack(BOOK_MAGIC, size, sum(len(moves) for moves in entries.values())))
+        for key in sorted(entries):
+            for x, y, score in entries[key]:
+                bookFile.write(BOOK_ENTRY.pack(key, x, y, score))
+
+
+GameRecord = collections.namedtuple('GameRecord', ['size', 'blackFirst', 'winner', 'moves'])
+
+
+# a move is stored as its cell index x * size + y, in one byte while every cell fits in one
+def get_record_format(size, count):
+    return struct.Struct(('<%dB' if size * size <= 256 else '<%dH') % count)
+
+
+# appends finished games to a record file, each flushed at once so that a crash loses at most the one being written
+class GameWriter:
+    def __init__(self, path):
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(RECORD_MAGIC)
+
+    def write(self, size, blackFirst, moves, winner=0):
+        cells = [x * size + y for x, y in moves]
+        self.file.write(RECORD_HEADER.pack(size, blackFirst, winner, len(cells))
+                        + get_record_format(size, len(cells)).pack(*cells))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# every GameRecord of a record file in the order written, read from a memory map; a game cut short is left out
+def read_games(path):
+    with open(path, 'rb') as recordFile:
+        if os.fstat(recordFile.fileno()).st_size == 0:
+            return
+        data = mmap.mmap(recordFile.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if data[:len(RECORD_MAGIC)] != RECORD_MAGIC:
+            raise ValueError('not a game record file: ' + path)
+        offset = len(RECORD_MAGIC)
+        cells = {}  # size -> (x, y) of each cell index
+        while offset + RECORD_HEADER.size <= len(data):
+            size, blackFirst, winner, count = RECORD_HEADER.unpack_from(data, offset)
+            offset += RECORD_HEADER.size
+            moveFormat = get_record_format(size, count)
+            if offset + moveFormat.size > len(data):
+                break
+            if size not in cells:
+                cells[size] = [divmod(cell, size) for cell in range(size * size)]
+            moves = [cells[size][cell] for cell in moveFormat.unpack_from(data, offset)]
+            yield GameRecord(size, blackFirst, winner, moves)
+            offset += moveFormat.size
+    finally:
+        data.close()
+
+
+# threat-space search: can the attacker win by fours only (VCF), or fours and live threes (VCT)
+class ThreatSolver:
+    def __init__(self, AI, vct=False, depth=THREAT_DEPTH, maxNodes=THREAT_NODES, timeLimit=THREAT_TIME):
+        self.AI = AI
+        self.chessBoard = AI.chessBoard
+        self.vct = vct
+        self.depth = depth
+        self.maxNodes = maxNodes
+        self.timeLimit = timeLimit
+        self.cache = {}  # canonical hash with the attacker to move -> (depth searched, canonical winning move or None)
+        self.nodes = 0
+        self.deadline = None
+
+    # first move of a forced win for attacker, or None if none was found within the limits
+    def solve(self, attacker, deadline=None):
+        self.nodes = 0
+        self.set_deadline(deadline)
+        try:
+            return self.solve_position(attacker)
+        except SearchTimeout:
+            return None
+
+    def solve_position(self, attacker):
+        candidates = sorted(self.chessBoard.candidates)
+        for x, y in candidates:
+            if self.AI.get_move_combination(x, y, attacker)[self.AI.CHESS_FIVE] > 0:
+                return x, y
+        return self.attack(attacker, self.depth, self.get_fives(3 - attacker, candidates))
+
+    # moves of defender after which attacker has no forced win, all of them if there is no threat
+    def get_defenses(self, defender, deadline=None):
+        attacker = 3 - defender
+        self.nodes = 0
+        self.set_deadline(deadline)
+        defenses = []
+        for x, y in sorted(self.chessBoard.candidates):
+            self.chessBoard.set_chess(x, y, defender)
+            try:
+                if len(self.get_fives(defender, self.get_line_cells(x, y))) > 0 or \
+                        self.solve_position(attacker) is None:
+                    defenses.append((x, y))  # a four of our own is forcing too
+            except SearchTimeout:
+                defenses.append((x, y))  # not proven lost
+            finally:
+                self.chessBoard.set_chess(x, y, 0)
+        return defenses
+
+    # own time limit from now, or the caller's deadline if that comes first
+    def set_deadline(self, deadline):
+        self.deadline = time.time() + self.timeLimit
+        if deadline is not None:
+            self.deadline = min(self.deadline, deadline)
+
+    # empty cells among cells where chessType would make five
+    def get_fives(self, chessType, cells):
+        return [(x, y) for x, y in cells
+                if self.chessBoard.board[x][y] == 0
+                and self.AI.get_move_combination(x, y, chessType)[self.AI.CHESS_FIVE] > 0]
+
+    # cells within four of (x, y) on its four lines, the only ones a chess there can make threats on
+    def get_line_cells(self, x, y):
+        cells = []
+        for lineId, pos in self.chessBoard.cellLines[x][y]:
+            line = self.chessBoard.lines[lineId]
+            cells.extend(line[max(pos - 4, 0):pos + 5])
+        return cells
+
+    # attacker to move and not facing five except at threats; returns a winning move or None
+    def attack(self, attacker, depth, threats):
+        self.nodes += 1
+        if self.nodes > self.maxNodes or time.time() >= self.deadline:
+            raise SearchTimeout()
+        if self.AI.stop is not None and self.AI.stop.is_set():
+            raise SearchTimeout()
+        if len(threats) > 1 or depth <= 0:
+            return None
+        key, symmetry = self.chessBoard.get_canonical()  # one entry for all rotations and reflections
+        key ^= self.AI.zobristSide[attacker]
+        entry = self.cache.get(key)
+        if entry is not None and (entry[1] is not None or entry[0] >= depth):
+            return None if entry[1] is None else self.chessBoard.untransform(entry[1][0], entry[1][1], symmetry)
+        result = None
+        AI = self.AI
+        for x, y in threats or sorted(self.chessBoard.candidates):
+            combination = AI.get_move_combination(x, y, attacker)
+            fours = combination[AI.CHESS_LIVE_FOUR] + combination[AI.CHESS_DEATH_FOUR]
+            if fours == 0 and not (self.vct and combination[AI.CHESS_LIVE_THREE] > 0):
+                continue
+            self.chessBoard.set_chess(x, y, attacker)
+            try:
+                if fours > 0:
+                    fives = self.get_fives(attacker, self.get_line_cells(x, y))
+                    win = len(fives) > 1 or (len(fives) == 1 and self.defend(attacker, depth, fives))
+                else:  # a live three: block it or answer with a four
+                    replies = self.get_replies(attacker)
+                    win = len(replies) > 0 and self.defend(attacker, depth, replies)
+            finally:
+                self.chessBoard.set_chess(x, y, 0)
+            if win:
+                result = (x, y)
+                break
+        if len(self.cache) >= THREAT_CACHE_SIZE:
+            self.cache.clear()
+        canonicalMove = None if result is None else self.chessBoard.transform(result[0], result[1], symmetry)
+        self.cache[key] = (depth, canonicalMove)
+        return result
+
+    # replies to a live three: cells where attacker would make a four, and fours of the defender
+    def get_replies(self, attacker):
+        AI = self.AI
+        replies = []
+        for x, y in sorted(self.chessBoard.candidates):
+            for chessType in (attacker, 3 - attacker):
+                combination = AI.get_move_combination(x, y, chessType)
+                if combination[AI.CHESS_LIVE_FOUR] + combination[AI.CHESS_DEATH_FOUR] > 0:
+                    replies.append((x, y))
+                    break
+        return replies
+
+    # attacker wins if every reply still leaves a forced win
+    def defend(self, attacker, depth, replies):
+        defender = 3 - attacker
+        for x, y in replies:
+            self.chessBoard.set_chess(x, y, defender)
+            try:
+                win = self.attack(attacker, depth - 1, self.get_fives(defender, self.get_line_cells(x, y)))
+            finally:
+                self.chessBoard.set_chess(x, y, 0)
+            if win is None:
+                return False
+        return True
+
+
+class GobangAI:
+    pointWindows = None  # shared by every GobangAI, built on first batched ordering
+    STATS_PHASES = [('reset_combination', 'patterns'), ('update_combination', 'patterns'),
+                    ('get_score', 'scoring'), ('get_search_order', 'ordering')]
+
+    def __init__(self, chessBoard, ttMemory=TT_MEMORY, batchOrder=True, workers=1, transpositionTable=None,
+                 weights=None, collectStats=False, threats=True, vct=False, pvs=True, aspiration=False, book=None,
+                 cache=None):
+        self.chessBoard = chessBoard
+        self.weights = dict(SCORE_WEIGHTS, **(weights or {}))
+        self.batchOrder = batchOrder  # needs numpy, turned off if it can't be imported
+        if transpositionTable is not None:
+            self.transpositionTable = transpositionTable
+        elif workers > 1:
+            self.transpositionTable = SharedTranspositionTable(ttMemory)
+        else:
+            self.transpositionTable = TranspositionTable(ttMemory)  # kept between moves of one game
+        self.helpers = None  # search processes besides this one
+        if workers > 1:
+            self.helpers = ParallelSearch(chessBoard.size, workers - 1, self.transpositionTable)
+        rand = random.Random(ZOBRIST_SEED + 1)
+        self.zobristSide = [0, rand.getrandbits(64), rand.getrandbits(64)]  # which side is to move
+        self.lineCombination = [None for x in range(len(chessBoard.lines))]
+        self.chessCombination = [[0 for x in range(8)] for y in range(2)]  # updated in place
+        self.scoreCombination = [[0 for x in range(8)] for y in range(2)]  # reused by pre_get_score
+        lineCells = (1 << LINE_KEY_BITS) + 2 * LINE_PADDING
+        self.visMarks = [0 for x in range(lineCells)]  # a cell of the line being classified is visited if its mark
+        self.doubleTwoMarks = [0 for x in range(4 * lineCells)]  # equals markEpoch, so they are cleared in O(1)
+        self.markEpoch = 0
+        self.CHESS_FIVE = 1
+        self.CHESS_LIVE_FOUR = 2
+        self.CHESS_DEATH_FOUR = 3
+        self.CHESS_LIVE_THREE = 4
+        self.CHESS_DEATH_THREE = 5
+        self.CHESS_LIVE_TWO = 6
+        self.CHESS_DEATH_TWO = 7
+        self.position = None
+        self.deadline = None
+        self.stop = None  # event set by another process to abort the search
+        self.startDepth = 1
+        self.helperRandom = None  # shuffles move order of helper processes
+        self.onDepth = None  # called with (depth, score, position) after each finished depth
+        self.finishedDepth = 0  # deepest depth the last think() finished
+        self.nodes = 0  # max_min_search calls of the last think()
+        self.collectStats = collectStats  # costs a timer call around every phase, so off by default
+        self.stats = None  # SearchStats of the last think() if collected
+        self.onStats = None  # called with the SearchStats after each think()
+        self.threatSolver = ThreatSolver(self, vct) if threats else None  # tried before the full search
+        self.rootMoves = None  # if set, the only root moves searched
+        self.ponder = None  # background search started by start_ponder
+        self.book = book  # OpeningBook consulted by decide
+        self.cache = cache  # PositionCache read at the root and shallow plies
+        if book is not None and book.size != chessBoard.size:
+            self.book = None
+        self.pvs = pvs  # principal variation search: null windows after the first move
+        self.aspiration = aspiration  # root window around an earlier score, off as it cost nodes on the corpus
+        self.lastScores = {}  # score of each depth of the last search, guesses for the next one
+        self.killers = []  # last two cutoff moves of each ply, for the current position only
+        self.history = [[[0 for x in range(chessBoard.size)] for y in range(chessBoard.size)]
+                        for chessType in range(2)]  # cutoffs of each side at each cell, weighted by depth
+
+    # settings a second GobangAI needs to search the same way, sharing the transposition table
+    def get_options(self):
+        return {'batchOrder': self.batchOrder, 'weights': self.weights, 'threats': self.threatSolver is not None,
+                'vct': self.threatSolver is not None and self.threatSolver.vct, 'pvs': self.pvs,
+                'aspiration': self.aspiration}
+
+    # stop pondering and helper processes, write the cache and free the shared transposition table
+    def close(self):
+        self.stop_ponder()
+        if self.cache is not None:
+            self.cache.flush()
+        if self.helpers is not None:
+            self.helpers.close()
+            self.helpers = None
+        if isinstance(self.transpositionTable, SharedTranspositionTable):
+            self.transpositionTable.close()
+
+    # if easy position exists, just search these positions
+    def get_search_order(self, chessAI, chessPlayer):  # search from center
+        if self.batchOrder:
+            if load_numpy():
+                return self.get_search_order_batch(chessAI, chessPlayer)
+            self.batchOrder = False
+        orders = []
+        greatOrder = [[] for x in range(8)]
+        for x, y in sorted(self.chessBoard.candidates):  # in board scan order
+            aiScore, playerScore = self.pre_get_score(x, y, chessAI, chessPlayer)
+            position = (max(aiScore, playerScore), x, y)
+            if aiScore >= 100000 or playerScore >= 100000:
+                greatOrder[0].append(position)
+            elif aiScore >= 10000:
+                greatOrder[1].append(position)
+            elif playerScore >= 10000:
+                greatOrder[2].append(position)
+            elif aiScore >= 1000:
+                greatOrder[3].append(position)
+            orders.append(position)
+        great = greatOrder[0] or greatOrder[1] or (greatOrder[2] + greatOrder[3] if greatOrder[2] else [])
+        if len(great) > 0:
+            if self.stats is not None:
+                self.stats.shortcuts += 1
+            return great
+        orders.sort(reverse=True)
+        return orders
+
+    # the same order as get_search_order, with every candidate scored at once; only the cells within 4 of a
+    # candidate are read, straight from the padded cells of the chessboard, so the cost follows the candidates
+    def get_search_order_batch(self, chessAI, chessPlayer):
+        chessBoard = self.chessBoard
+        if len(chessBoard.candidates) == 0:
+            return []
+        xs, ys = numpy.array(sorted(chessBoard.candidates)).T
+        windows = self.get_point_windows()
+        cells = numpy.frombuffer(chessBoard.cells, dtype=numpy.uint8)
+        centers = ((xs + LINE_PADDING) * chessBoard.stride + ys + LINE_PADDING)[:, None]
+        offsets = numpy.array((-4, -3, -2, -1, 1, 2, 3, 4))
+        powers = 3 ** numpy.arange(8)
+        neighborhoods = [cells[centers + offsets * (dir_x * chessBoard.stride + dir_y)] for dir_x, dir_y in DIRECTIONS]
+        chessCombination = []
+        for chessType in (chessAI, chessPlayer):
+            combination = numpy.zeros((len(xs), 8), dtype=numpy.int64)
+            for neighborhood in neighborhoods:
+                state = numpy.where(neighborhood == chessType, 1, numpy.where(neighborhood == 0, 0, 2))  # EDGE too
+                combination += windows[state @ powers]
+            chessCombination.append(combination)
+        aiScore, playerScore = self.compute_score_batch(chessCombination[0], chessCombination[1])
+        weight = numpy.maximum(aiScore, playerScore)
+        greatOrder = [(aiScore >= 100000) | (playerScore >= 100000)]
+        greatOrder.append(~greatOrder[0] & (aiScore >= 10000))
+        greatOrder.append(~greatOrder[0] & ~greatOrder[1] & (playerScore >= 10000))
+        greatOrder.append(~greatOrder[0] & ~greatOrder[1] & ~greatOrder[2] & (aiScore >= 1000))
+        if greatOrder[0].any():
+            selected = numpy.nonzero(greatOrder[0])[0]
+        elif greatOrder[1].any():
+            selected = numpy.nonzero(greatOrder[1])[0]
+        elif greatOrder[2].any():
+            selected = numpy.concatenate((numpy.nonzero(greatOrder[2])[0], numpy.nonzero(greatOrder[3])[0]))
+        else:
+            selected = numpy.lexsort((ys, xs, weight))[::-1]
+        if self.stats is not None and (greatOrder[0].any() or greatOrder[1].any() or greatOrder[2].any()):
+            self.stats.shortcuts += 1
+        return [(int(weight[i]), int(xs[i]), int(ys[i])) for i in selected]
+
+    # chess combination of a chess from its 8 neighbours on one line, for every 3-state neighbourhood
+    def get_point_windows(self):
+        if GobangAI.pointWindows is None:
+            windows = numpy.zeros((3 ** 8, 8), dtype=numpy.int64)
+            for code in range(3 ** 8):
+                black, white = 1 << 4, 0  # the chess itself is black in the middle of a 9-cell line
+                for index, pos in enumerate((0, 1, 2, 3, 5, 6, 7, 8)):
+                    state = code // 3 ** index % 3
+                    if state == 1:
+                        black |= 1 << pos
+                    elif state == 2:
+                        white |= 1 << pos
+                windows[code] = self.get_point_combination(get_line_key(black, white, 9), 4)
+            GobangAI.pointWindows = windows
+        return GobangAI.pointWindows
+
+    # before AI starts searching, check if easy position exists
+    def pre_get_score(self, x, y, chessAI, chessPlayer):
+        chessCombination = self.scoreCombination
+        for side in chessCombination:
+            side[:] = EMPTY_COMBINATION
+        for lineId, pos in self.chessBoard.cellLines[x][y]:
+            key = self.chessBoard.get_line_key(lineId)
+            length = key & ((1 << LINE_KEY_BITS) - 1)
+            for chessType in (chessAI, chessPlayer):  # put a chess of each side at (x, y)
+                shift = LINE_KEY_BITS + pos + (length if chessType == 2 else 0)
+                pointCombination = self.get_point_combination(key | 1 << shift, pos)
+                for index in range(8):
+                    chessCombination[chessType - 1][index] += pointCombination[index]
+        aiScore, playerScore =\
+            self.compute_score(chessCombination[chessAI - 1], chessCombination[chessPlayer - 1])
+        return aiScore, playerScore
+
+    # chess combination made by a chess of chessType put at the empty cell (x, y)
+    def get_move_combination(self, x, y, chessType):
+        moveCombination = [0 for x in range(8)]
+        for lineId, pos in self.chessBoard.cellLines[x][y]:
+            key = self.chessBoard.get_line_key(lineId)
+            length = key & ((1 << LINE_KEY_BITS) - 1)
+            shift = LINE_KEY_BITS + pos + (length if chessType == 2 else 0)
+            pointCombination = self.get_point_combination(key | 1 << shift, pos)
+            for index in range(8):
+                moveCombination[index] += pointCombination[index]
+        return moveCombination
+
+    # AI decides, posting result to Gobang Game
+    def decide(self, chessType, timeLimit=None):
+        depth = SEARCH_DEPTH if timeLimit is None else MAX_SEARCH_DEPTH
+        result = self.take_ponder(depth, timeLimit)
+        bookMove = self.get_book_move(chessType)
+        if bookMove is not None:
+            return bookMove
+        if result is not None:
+            score, x, y = result
+            return x, y
+        score, x, y = self.think(chessType, depth, timeLimit)
+        return x, y
+
+    # best book move of chessType in the position on the chessboard, or None
+    def get_book_move(self, chessType):
+        if self.book is None:
+            return None
+        key, symmetry = self.chessBoard.get_canonical()
+        for u, v, score in self.book.get(key ^ self.zobristSide[chessType]):
+            x, y = self.chessBoard.untransform(u, v, symmetry)
+            if self.chessBoard.board[x][y] == 0:  # else a hash collision
+                return x, y
+        return None
+
+    # search replies of the other side until stop_ponder, chessType being the side of this AI
+    def start_ponder(self, chessType, depth=SEARCH_DEPTH, replies=PONDER_REPLIES):
+        self.stop_ponder()
+        self.ponder = Ponder(self, chessType, depth, replies)
+
+    # (depth, score, x, y) pondered for the position now on the chessboard, or None
+    def stop_ponder(self):
+        if self.ponder is None:
+            return None
+        ponder, self.ponder = self.ponder, None
+        return ponder.finish(self.chessBoard.chessList)
+
+    # stop pondering; (score, x, y) if the position now on the chessboard was searched deep enough already
+    def take_ponder(self, depth, timeLimit=None):
+        result = self.stop_ponder()
+        if result is None or timeLimit is not None or result[0] < depth:  # with a time limit, only the table helps
+            return None
+        self.finishedDepth, score, x, y = result
+        self.stats = None
+        return score, x, y
+
+    # how AI make its choice, with helper processes searching alongside if there are any
+    def think(self, chessType, depth=SEARCH_DEPTH, timeLimit=None):
+        startTime = time.time()
+        deadline = None if timeLimit is None else startTime + timeLimit
+        self.nodes = 0
+        self.stats = None
+        if len(self.chessBoard.chessList) == 0:  # nothing to search next to
+            self.finishedDepth = 0
+            center = self.chessBoard.size // 2
+            return 0, center, center
+        if len(self.chessBoard.candidates) == 0:  # a full chessboard, as candidates are next to some chess
+            raise ValueError('no empty cell left')
+        if self.collectStats:
+            self.start_stats()
+        self.reset_combination()
+        self.transpositionTable.new_search()
+        self.age_history()
+        key = self.chessBoard.hash ^ self.zobristSide[chessType]
+        entry = self.get_cached(key, depth)
+        if entry is not None:  # searched as deep before, maybe by another process
+            cachedDepth, score, position = entry
+            finishedDepth = 0 if cachedDepth == PositionCache.PROVEN else min(cachedDepth, depth)
+        else:
+            threatDeadline = None if timeLimit is None else startTime + timeLimit * THREAT_SHARE
+            position = self.solve_threats(chessType, threatDeadline)
+            if position is not None:  # a proven win is played without searching
+                score, finishedDepth = 100000, 0
+                self.put_cached(key, PositionCache.PROVEN, score, position)
+            else:
+                if self.helpers is not None:
+                    self.helpers.start(self, chessType, depth, deadline)
+                score, position, finishedDepth = self.iterative_search(chessType, depth, deadline)
+                if self.helpers is not None:  # a helper may have got deeper before the deadline
+                    for helperDepth, helperScore, helperPosition in self.helpers.finish():
+                        if helperDepth > finishedDepth and helperPosition is not None:
+                            score, position, finishedDepth = helperScore, helperPosition, helperDepth
+                if position is not None and finishedDepth >= CACHE_MIN_DEPTH:
+                    self.put_cached(key, finishedDepth, score, position)
+        self.finishedDepth = finishedDepth
+        if self.collectStats:
+            self.finish_stats(startTime)
+        if position is None and self.stop is not None and self.stop.is_set():  # stopped before depth 1 finished
+            raise SearchTimeout()
+        x, y = position
+        return score, x, y
+
+    # history is kept between moves, halved each time so that old cutoffs fade
+    def age_history(self):
+        for side in self.history:
+            for row in side:
+                row[:] = [count >> 1 for count in row]
+
+    # (depth, score, move) on disk for key, if searched at least depth deep
+    def get_cached(self, key, depth):
+        if self.cache is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is None or entry[0] < depth:
+            return None
+        x, y = entry[2]
+        if self.chessBoard.board[x][y] != 0:  # a hash collision
+            return None
+        return entry
+
+    def put_cached(self, key, depth, score, position):
+        if self.cache is not None:
+            self.cache.put(key, depth, score, position)
+
+    # winning move of chessType by threats; else, if the other side has one, keep the root to moves stopping it
+    def solve_threats(self, chessType, deadline=None):
+        self.rootMoves = None
+        if self.threatSolver is None:
+            return None
+        solver = self.threatSolver
+        move = solver.solve(chessType, deadline)
+        nodes = solver.nodes
+        if move is None:
+            threat = solver.solve(3 - chessType, deadline)
+            nodes += solver.nodes
+            if threat is not None:
+                self.rootMoves = set(solver.get_defenses(chessType, deadline))
+                nodes += solver.nodes
+        if self.stats is not None:
+            self.stats.threatNodes += nodes
+        return move
+
+    # fresh SearchStats, with the phase methods of this GobangAI timed into it until finish_stats
+    def start_stats(self):
+        self.stats = SearchStats()
+        for name, phase in GobangAI.STATS_PHASES:
+            setattr(self, name, self.stats.timed(phase, getattr(GobangAI, name).__get__(self)))
+
+    def finish_stats(self, startTime):
+        for name, phase in GobangAI.STATS_PHASES:
+            del self.__dict__[name]  # back to the plain methods
+        self.stats.totalSeconds = time.time() - startTime
+        if self.onStats is not None:
+            self.onStats(self.stats)
+
+    # iterative deepening, each depth starting from the best line found before
+    def iterative_search(self, chessType, depth, deadline=None):
+        score, position, finishedDepth = None, None, 0
+        depthScores = {}  # scores swing between odd and even depths, so guesses come from two depths before
+        self.killers = [[None, None] for ply in range(depth)]
+        for currentDepth in range(self.startDepth, depth + 1):
+            if currentDepth > 1 and deadline is not None:  # depth 1 always finishes
+                if time.time() >= deadline:
+                    break
+                self.deadline = deadline
+            depthStart = time.time()
+            guess = depthScores.get(currentDepth - 2, self.lastScores.get(currentDepth))
+            try:
+                currentScore = self.root_search(chessType, currentDepth, guess)
+            except SearchTimeout:
+                break
+            finally:
+                self.deadline = None
+            score, position, finishedDepth = currentScore, self.position, currentDepth
+            depthScores[currentDepth] = score
+            if self.stats is not None:
+                self.stats.depthSeconds[currentDepth] = time.time() - depthStart
+            if self.onDepth is not None:
+                self.onDepth(currentDepth, score, position)
+            if position is None or abs(score) >= 100000:  # nothing to search or game decided
+                break
+        self.lastScores = depthScores
+        return score, position, finishedDepth
+
+    # search the root in a window around guess, widened and searched again while the score falls outside it
+    def root_search(self, chessType, depth, guess):
+        alpha, beta = -0x7fffffff, 0x7fffffff
+        delta = ASPIRATION_WINDOW
+        if self.aspiration and guess is not None and abs(guess) < 9000:  # threat scores jump too far
+            alpha, beta = guess - delta, guess + delta
+        while True:
+            self.position = None
+            score = self.max_min_search(chessType, depth, depth, alpha, beta)
+            if alpha < score < beta or (alpha == -0x7fffffff and beta == 0x7fffffff):
+                return score
+            delta *= 4
+            if score <= alpha:
+                alpha = max(guess - delta, -0x7fffffff) if delta < 9000 else -0x7fffffff
+            else:
+                beta = min(guess + delta, 0x7fffffff) if delta < 9000 else 0x7fffffff
+            if self.stats is not None:
+                self.stats.researches += 1
+
+    # max_min search allows multi-depth thinking
+    def max_min_search(self, chessAI, depth, maxDepth, alpha=-0x7fffffff, beta=0x7fffffff):
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise SearchTimeout()
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
+        self.nodes += 1
+        stats = self.stats
+        if stats is not None:
+            stats.nodes[maxDepth] += 1
+        chessPlayer = 3 - chessAI
+        score = self.get_score(chessAI, chessPlayer)
+        if depth <= 0 or abs(score) >= 10000:
+            return score
+        key = self.chessBoard.hash ^ self.zobristSide[chessAI]
+        entry = self.transpositionTable.get(key)
+        ttMove = None
+        if entry is not None:
+            ttDepth, ttScore, flag, ttMove = entry
+            if ttDepth >= depth and depth != maxDepth:  # root still has to find its position
+                if flag == TranspositionTable.EXACT:
+                    return ttScore
+                if flag == TranspositionTable.LOWER and ttScore >= beta:
+                    return beta
+                if flag == TranspositionTable.UPPER and ttScore <= alpha:
+                    return alpha
+        ply = maxDepth - depth
+        if 0 < ply <= CACHE_PLIES:
+            entry = self.get_cached(key, depth)
+            if entry is not None:
+                return entry[1]
+        alphaOrigin = alpha
+        position = None
+        index = -1
+        for index, (x, y) in enumerate(self.get_node_orders(chessAI, depth, maxDepth, ttMove)):
+            self.make_move(x, y, chessAI)
+            try:
+                if index == 0 or not self.pvs:
+                    score = -self.max_min_search(chessPlayer, depth - 1, maxDepth, -beta, -alpha)
+                else:  # prove the move is no better than the first with a null window, search again if it is
+                    score = -self.max_min_search(chessPlayer, depth - 1, maxDepth, -alpha - 1, -alpha)
+                    if alpha < score < beta:
+                        if stats is not None:
+                            stats.researches += 1
+                        score = -self.max_min_search(chessPlayer, depth - 1, maxDepth, -beta, -alpha)
+            finally:  # the board must be restored even when time is up
+                self.unmake_move(x, y)
+            if score > alpha:
+                alpha = score
+                position = (x, y)
+                if alpha >= beta:
+                    if stats is not None:
+                        stats.cutoffs[index] += 1
+                    self.add_cutoff(chessAI, ply, depth, position)
+                    break
+        if index < 0:  # no move to search
+            return score
+        if alpha <= alphaOrigin:
+            flag = TranspositionTable.UPPER
+        elif alpha >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self.transpositionTable.put(key, depth, alpha, flag, position)
+        if flag == TranspositionTable.EXACT and 0 < ply <= CACHE_PLIES and depth >= CACHE_MIN_DEPTH:
+            self.put_cached(key, depth, alpha, position)
+        if depth == maxDepth and position:
+            self.position = position
+        return alpha
+
+    # moves of one node, best first: the move stored for this very position is tried before the order is computed,
+    # as it is always part of it, then killer moves of this ply and the rest by static score and history
+    def get_node_orders(self, chessAI, depth, maxDepth, ttMove):
+        isRoot = depth == maxDepth
+        if ttMove is not None and not isRoot:
+            if self.chessBoard.board[ttMove[0]][ttMove[1]] != 0:  # Zobrist collision
+                ttMove = None
+            else:
+                yield ttMove
+        orders = self.get_search_order(chessAI, 3 - chessAI)
+        if self.stats is not None:
+            self.stats.orderings += 1
+            self.stats.candidates += len(orders)
+        if isRoot and self.rootMoves:  # the other side has a forced win against any other move
+            orders = [order for order in orders if (order[1], order[2]) in self.rootMoves] or orders
+        if isRoot:
+            symmetries = self.chessBoard.get_symmetries()
+            if len(symmetries) > 0:  # moves the position maps onto each other lead to the same game
+                orders = self.remove_symmetric(orders, symmetries)
+        history = self.history[chessAI - 1]
+        if self.helperRandom is not None:  # helpers break ties in their own way to search other lines first
+            orders.sort(key=lambda order: order[0] + self.helperRandom.random(), reverse=True)
+        else:
+            orders.sort(key=lambda order: (order[0], history[order[1]][order[2]]), reverse=True)
+        if isRoot and ttMove is not None and any((x, y) == ttMove for weight, x, y in orders):
+            yield ttMove  # the root still searches its TT move first
+        plyKillers = self.killers[maxDepth - depth]
+        killers = [(x, y) for weight, x, y in orders
+                   if weight < KILLER_WEIGHT and (x, y) in plyKillers and (x, y) != ttMove]
+        quiet = False
+        for weight, x, y in orders:
+            if weight < KILLER_WEIGHT and not quiet:  # killers go after the threats, before other quiet moves
+                quiet = True
+                for killer in killers:
+                    yield killer
+            if (x, y) != ttMove and (x, y) not in killers:
+                yield x, y
+
+    # the first move of orders from each set of moves that the symmetries map onto each other
+    def remove_symmetric(self, orders, symmetries):
+        kept, cells = [], set()
+        for weight, x, y in orders:
+            if not any(self.chessBoard.transform(x, y, t) in cells for t in symmetries):
+                kept.append((weight, x, y))
+                cells.add((x, y))
+        return kept
+
+    # remember a move that caused a beta cutoff, for its siblings and for later searches
+    def add_cutoff(self, chessAI, ply, depth, position):
+        killers = self.killers[ply]
+        if killers[0] != position:
+            killers[1] = killers[0]
+            killers[0] = position
+        x, y = position
+        self.history[chessAI - 1][x][y] += depth * depth
+
+    # compute both side chess combination
+    def compute_chess_combination(self, chessAI, chessPlayer, checkWin=False):
+        self.reset_combination()
+        chessCombination = self.chessCombination
+        if checkWin:
+            aiScore, playerScore = self.compute_score(chessCombination[0], chessCombination[1])
+            score = aiScore - playerScore
+            print('Black side point: ' + str(score))
+            return chessCombination[chessAI - 1][self.CHESS_FIVE] > 0
+        return chessCombination
+
+    # recompute every line from scratch, e.g. after chessboard changed outside the search
+    def reset_combination(self):
+        for side in self.chessCombination:
+            side[:] = EMPTY_COMBINATION
+        for lineId in range(len(self.chessBoard.lines)):
+            lineCombination = self.get_line_combination(self.chessBoard.get_line_key(lineId))
+            self.lineCombination[lineId] = lineCombination
+            for side in range(2):
+                for chessType in range(8):
+                    self.chessCombination[side][chessType] += lineCombination[side][chessType]
+
+    # only the four lines through (x, y) change after a chess is put or taken
+    def update_combination(self, x, y):
+        for lineId, pos in self.chessBoard.cellLines[x][y]:
+            lineCombination = self.get_line_combination(self.chessBoard.get_line_key(lineId))
+            oldCombination = self.lineCombination[lineId]
+            if lineCombination is oldCombination:
+                continue
+            self.lineCombination[lineId] = lineCombination
+            for side in range(2):
+                for chessType in range(8):
+                    self.chessCombination[side][chessType] += \
+                        lineCombination[side][chessType] - oldCombination[side][chessType]
+
+    # in-place make/unmake used by the search, keeping chess combination up to date
+    def make_move(self, x, y, chessType):
+        self.chessBoard.set_chess(x, y, chessType)
+        self.update_combination(x, y)
+
+    def unmake_move(self, x, y):
+        self.chessBoard.set_chess(x, y, 0)
+        self.update_combination(x, y)
+
+    # chess combination of a line: classified by the branch tree once, then looked up by line key
+    def get_line_combination(self, key):
+        lineCombination = LINE_PATTERNS.get(key)
+        if lineCombination is None:
+            chessCombination = [[0 for x in range(8)] for y in range(2)]
+            self.compute_line_combination(decode_padded_line(key), chessCombination)
+            lineCombination = (tuple(chessCombination[0]), tuple(chessCombination[1]))
+            if len(LINE_PATTERNS) >= PATTERN_TABLE_SIZE:
+                LINE_PATTERNS.clear()
+            LINE_PATTERNS[key] = lineCombination
+        return lineCombination
+
+    # chess combination made by the chess at position pos of a line only, for that chess's side
+    def get_point_combination(self, key, pos):
+        pointKey = key << LINE_KEY_BITS | pos
+        pointCombination = POINT_PATTERNS.get(pointKey)
+        if pointCombination is None:
+            line = decode_padded_line(key)
+            chessAI = line[pos + LINE_PADDING]
+            chessCombination = [[0 for x in range(8)] for y in range(2)]
+            self.markEpoch += 1
+            self.compute_line_side_combination(chessAI, 3 - chessAI, chessCombination, line, pos + LINE_PADDING)
+            pointCombination = tuple(chessCombination[chessAI - 1])
+            if len(POINT_PATTERNS) >= PATTERN_TABLE_SIZE:
+                POINT_PATTERNS.clear()
+            POINT_PATTERNS[pointKey] = pointCombination
+        return pointCombination
+
+    # compute chess combination of one padded line, chess visited in the same order as a whole board scan
+    def compute_line_combination(self, line, chessCombination):
+        self.markEpoch += 1  # forgets every visit mark of the line before
+        for x in range(LINE_PADDING, len(line) - LINE_PADDING):
+            if line[x] != 0:
+                self.compute_line_side_combination(line[x], 3 - line[x], chessCombination, line, x)
+
+    # compute one chess side chess combination starting from position x of a padded line
+    def compute_line_side_combination(self, chessAI, chessPlayer, chessCombination, line, x):
+        vis, isDoubleTwo, epoch = self.visMarks, self.doubleTwoMarks, self.markEpoch  # isDoubleTwo[4 * x + kind]
+
+        def is_ai(xx):
+            return line[xx] == chessAI
+
+        def is_player(xx):  # the padding blocks a line just like an enemy chess
+            return line[xx] == chessPlayer or line[xx] == EDGE
+
+        def is_empty(xx):
+            return line[xx] == 0
+
+        def add_live_four():
+            chessCombination[chessAI - 1][self.CHESS_LIVE_FOUR] += 1
+
+        def add_death_four():
+            chessCombination[chessAI - 1][self.CHESS_DEATH_FOUR] += 1
+
+        def add_live_three():
+            chessCombination[chessAI - 1][self.CHESS_LIVE_THREE] += 1
+
+        def add_death_three():
+            chessCombination[chessAI - 1][self.CHESS_DEATH_THREE] += 1
+
+        def add_live_two():
+            chessCombination[chessAI - 1][self.CHESS_LIVE_TWO] += 1
+
+        def add_death_two():
+            chessCombination[chessAI - 1][self.CHESS_DEATH_TWO] += 1
+
+        def add_five():
+            chessCombination[chessAI - 1][self.CHESS_FIVE] += 1
+
+        if vis[x] == epoch:
+            return
+        vis[x] = epoch
+        count, l_max, r_max, enemy = 1, 0, 0, 0
+        l_death, r_death = False, False
+        for i in range(1, 5):
+            next_x = x + i
+            if is_ai(next_x):
+                count += 1
+                l_max = i
+                vis[next_x] = epoch
+            else:
+                if is_player(next_x):
+                    enemy += 1
+                    l_death = True
+                break
+        for i in range(1, 5):
+            next_x = x - i
+            if is_ai(next_x):
+                count += 1
+                r_max = i
+                vis[next_x] = epoch
+            else:
+                if is_player(next_x):
+                    enemy += 1
+                    r_death = True
+                break
+        if count >= 5:  # *****
+            add_five()
+        elif enemy == 2:  # Since then, only one or zero enemies left
+            return
+        elif count == 4:
+            if enemy == 0:  # -****-
+                add_live_four()
+            else:  # -****^
+                add_death_four()
+        elif count == 3:
+            if enemy == 0:
+                next_x = x + l_max + 2
+                enemy_far = 0
+                if is_ai(next_x):  # *-***-
+                    add_death_four()
+                elif is_player(next_x):  # ^-***-
+                    enemy_far += 1
+                next_x = x - r_max - 2
+                if is_ai(next_x):  # -***-*
+                    add_death_four()
+                elif is_player(next_x):  # -***-^
+                    enemy_far += 1
+                if enemy_far == 2:  # ^-***-^
+                    add_death_three()
+                else:  # -***-
+                    add_live_three()
+            else:  # enemy is 1
+                if l_death:  # ^***-
+                    next_x = x - r_max - 2
+                    if is_ai(next_x):  # ^***-*
+                        add_death_four()
+                    elif is_empty(next_x):  # ^***--
+                        add_death_three()
+                elif r_death:  # -***^
+                    next_x = x + l_max + 2
+                    if is_ai(next_x):  # *-***^
+                        add_death_four()
+                    elif is_empty(next_x):  # --***^
+                        add_death_three()
+        elif count == 2:
+            if enemy == 0:  # -**-
+                enemy_far = 0
+                empty = 0
+                next_x = x + l_max + 2
+                if is_ai(next_x):  # ?*-**-
+                    next_xx = x + l_max + 3
+                    if is_ai(next_xx):  # **-**-
+                        if isDoubleTwo[4 * (next_x - 1)] != epoch:
+                            add_death_four()
+                            isDoubleTwo[4 * (next_x - 1)] = epoch
+                    elif is_player(next_xx):  # ^*-**-
+                        add_death_three()
+                    else:  # -*-**-
+                        add_live_three()
+                elif is_player(next_x):  # ^-**-
+                    enemy_far += 1
+                else:  # ?--**-
+                    next_xx = x + l_max + 3
+                    if is_ai(next_xx):  # *--**-
+                        add_death_three()
+                    else:
+                        empty += 1
+                next_x = x - r_max - 2
+                if is_ai(next_x):  # -**-*?
+                    next_xx = x - r_max - 3
+                    if is_ai(next_xx):  # -**-**
+                        if isDoubleTwo[4 * (next_x + 1)] != epoch:
+                            add_death_four()
+                            isDoubleTwo[4 * (next_x - 1)] = epoch
+                    elif is_player(next_xx):  # -**-*^
+                        add_death_three()
+                    else:  # -**-*-
+                        add_live_three()
+                elif is_player(next_x):  # -**-^
+                    enemy_far += 1
+                else:  # -**--?
+                    next_xx = x - r_max - 3
+                    if is_ai(next_xx):  # -**--*
+                        add_death_three()
+                    else:
+                        empty += 1
+                if enemy_far == 2:  # ^-**-^
+                    return
+                elif empty == 2:  # n--**--n
+                    add_live_two()
+            else:
+                if l_death:  # ^**-
+                    next_x = x - r_max - 2
+                    if is_ai(next_x):  # ^**-*?
+                        next_xx = x - r_max - 3
+                        if is_ai(next_xx):  # ^**-**
+                            if isDoubleTwo[4 * (next_x + 1)] != epoch:
+                                add_death_four()
+                                isDoubleTwo[4 * (next_x - 1)] = epoch
+                        elif is_player(next_xx):  # ^**-*^
+                            return
+                        else:  # ^**-*-
+                            add_death_three()
+                    elif is_player(next_x):  # ^**-^
+                        return
+                    else:  # ^**--?
+                        next_xx = x - r_max - 3
+                        if is_ai(next_xx):  # ^**--*
+                            add_death_three()
+                        elif is_player(next_xx):  # ^**--^
+                            return
+                        else:  # ^**---
+                            add_death_two()
+                elif r_death:  # ?-**^
+                    next_x = x + l_max + 2
+                    if is_ai(next_x):  # ?*-**^
+                        next_xx = x + l_max + 3
+                        if is_ai(next_xx):  # **-**^
+                            if isDoubleTwo[4 * (next_x - 1)] != epoch:
+                                add_death_four()
+                                isDoubleTwo[4 * (next_x - 1)] = epoch
+                        elif is_player(next_xx):  # ^*-**^
+                            return
+                        else:  # -*-**^
+                            add_death_three()
+                    elif is_player(next_x):  # ^-**^
+                        return
+                    else:  # ?--**^
+                        next_xx = x - r_max - 3
+                        if is_ai(next_xx):  # *--**^
+                            add_death_three()
+                        elif is_player(next_xx):  # ^--**^
+                            return
+                        else:  # ---**^
+                            add_death_two()
+        elif count == 1:
+            if enemy == 0:  # -*-
+                next_x = x + l_max + 2
+                if is_ai(next_x):  # ?*-*-
+                    next_xx = x + l_max + 3
+                    if is_empty(next_xx):  # -*-*-
+                        if isDoubleTwo[4 * (next_x - 1) + 1] != epoch:
+                            isDoubleTwo[4 * (next_x - 1) + 1] = epoch
+                            add_live_two()
+                    next_xx = x - r_max - 2
+                    if is_ai(next_xx):  # *-*-*
+                        add_death_three()
+                elif is_empty(next_x):  # ?--*-
+                    next_xx = x + l_max + 3
+                    if is_ai(next_xx):  # ?*--*-
+                        next_xxx = x + l_max + 4
+                        if is_empty(next_xxx):  # -*--*-
+                            if isDoubleTwo[4 * next_x + 2] != epoch:
+                                isDoubleTwo[4 * next_x + 2] = epoch
+                                isDoubleTwo[4 * (next_x - 1) + 2] = epoch
+                                add_live_two()
+                    elif is_empty(next_xx):  # ?---*-
+                        next_xxx = x + l_max + 4
+                        if is_ai(next_xxx):  # *---*-
+                            if isDoubleTwo[4 * next_x + 3] != epoch:
+                                isDoubleTwo[4 * next_x + 3] = epoch
+                                add_death_two()
+                next_x = x - r_max - 2
+                if is_ai(next_x):  # -*-*?
+                    next_xx = x - r_max - 3
+                    if is_empty(next_xx):  # -*-*-
+                        if isDoubleTwo[4 * (next_x + 1) + 1] != epoch:
+                            isDoubleTwo[4 * (next_x + 1) + 1] = epoch
+                            add_live_two()
+                elif is_empty(next_x):  # -*--?
+                    next_xx = x - r_max - 3
+                    if is_ai(next_xx):  # -*--*?
+                        next_xxx = x - r_max - 4
+                        if is_empty(next_xxx):  # -*--*-
+                            if isDoubleTwo[4 * next_x + 2] != epoch:
+                                isDoubleTwo[4 * next_x + 2] = epoch
+                                isDoubleTwo[4 * (next_x + 1) + 2] = epoch
+                                add_live_two()
+                    elif is_empty(next_xx):  # -*---?
+                        next_xxx = x - r_max - 4
+                        if is_ai(next_xxx):  # -*---*
+                            if isDoubleTwo[4 * next_x + 3] != epoch:
+                                isDoubleTwo[4 * next_x + 3] = epoch
+                                add_death_two()
+            else:
+                if l_death:  # ^*-?
+                    next_x = x - r_max - 2
+                    next_xx = x - r_max - 3
+                    next_xxx = x - r_max - 4
+                    if is_ai(next_x) \
+                            and is_empty(next_xx) \
+                            and is_empty(next_xxx):  # ^*-*--
+                        if isDoubleTwo[4 * (next_x + 1) + 1] != epoch:
+                            isDoubleTwo[4 * (next_x + 1) + 1] = epoch
+                            add_death_two()
+                    elif is_empty(next_x) \
+                            and is_ai(next_xx) \
+                            and is_empty(next_xxx):  # ^*--*-
+                        if isDoubleTwo[4 * next_x + 2] != epoch:
+                            isDoubleTwo[4 * next_x + 2] = epoch
+                            isDoubleTwo[4 * (next_x + 1) + 2] = epoch
+                            add_death_two()
+                    elif is_empty(next_x) \
+                            and is_empty(next_xx) \
+                            and is_ai(next_xxx):  # ^*---*
+                        if isDoubleTwo[4 * next_x + 3] != epoch:
+                            isDoubleTwo[4 * next_x + 3] = epoch
+                            add_death_two()
+                elif r_death:  # ?-*^
+                    next_x = x + l_max + 2
+                    next_xx = x + l_max + 3
+                    next_xxx = x + l_max + 4
+                    if is_ai(next_x) \
+                            and is_empty(next_xx) \
+                            and is_empty(next_xxx):  # --*-*^
+                        if isDoubleTwo[4 * (next_x - 1) + 1] != epoch:
+                            isDoubleTwo[4 * (next_x - 1) + 1] = epoch
+                            add_death_two()
+                    elif is_empty(next_x) \
+                            and is_ai(next_xx) \
+                            and is_empty(next_xxx):  # -*--*^
+                        if isDoubleTwo[4 * next_x + 2] != epoch:
+                            isDoubleTwo[4 * next_x + 2] = epoch
+                            isDoubleTwo[4 * (next_x - 1) + 2] = epoch
+                            add_death_two()
+                    elif is_empty(next_x) \
+                            and is_empty(next_xx) \
+                            and is_ai(next_xxx):  # *---*^
+                        if isDoubleTwo[4 * next_x + 3] != epoch:
+                            isDoubleTwo[4 * next_x + 3] = epoch
+                            add_death_two()
+
+    # compute ai score and player score
+    def compute_score(self, ai_combination, player_combination):
+        ai_score, player_score = 0, 0
+        if ai_combination[self.CHESS_FIVE] > 0:
+            return 100000, 0
+        if player_combination[self.CHESS_FIVE] > 0:
+            return 0, 100000
+        if ai_combination[self.CHESS_LIVE_FOUR] + ai_combination[self.CHESS_DEATH_FOUR] // 2 > 0:
+            return 9050, 0
+        if ai_combination[self.CHESS_DEATH_FOUR] > 0:
+            return 9040, 0
+        if player_combination[self.CHESS_LIVE_FOUR] + player_combination[self.CHESS_DEATH_FOUR] // 2 > 0:
+            return 0, 9030
+        if player_combination[self.CHESS_DEATH_FOUR] > 0 and player_combination[self.CHESS_LIVE_THREE] > 0:
+            return 0, 9020
+        if ai_combination[self.CHESS_LIVE_THREE] > 0 and player_combination[self.CHESS_DEATH_FOUR] == 0:
+            return 9010, 0
+        if player_combination[self.CHESS_LIVE_THREE] > 1 \
+                and ai_combination[self.CHESS_LIVE_THREE] == 0 \
+                and ai_combination[self.CHESS_DEATH_THREE] == 0:
+            return 0, 9000
+
+        weights = self.weights
+        if player_combination[self.CHESS_DEATH_FOUR] > 0:
+            player_score += weights['playerDeathFour']
+
+        if ai_combination[self.CHESS_LIVE_THREE] > 1:
+            ai_score += weights['doubleLiveThree']
+        elif ai_combination[self.CHESS_LIVE_THREE] > 0:
+            ai_score += weights['liveThree']
+
+        if player_combination[self.CHESS_LIVE_THREE] > 1:
+            player_score += weights['playerDoubleLiveThree']
+        elif player_combination[self.CHESS_LIVE_THREE] > 0:
+            player_score += weights['playerLiveThree']
+
+        ai_score += ai_combination[self.CHESS_DEATH_THREE] * weights['deathThree']
+        player_score += player_combination[self.CHESS_DEATH_THREE] * weights['deathThree']
+        ai_score += ai_combination[self.CHESS_LIVE_TWO] * weights['liveTwo']
+        player_score += player_combination[self.CHESS_LIVE_TWO] * weights['liveTwo']
+        ai_score += ai_combination[self.CHESS_DEATH_TWO] * weights['deathTwo']
+        player_score += player_combination[self.CHESS_DEATH_TWO] * weights['deathTwo']
+
+        return ai_score, player_score
+
+    # compute_score for arrays of chess combinations, one row each
+    def compute_score_batch(self, ai_combination, player_combination):
+        ai = [ai_combination[:, index] for index in range(8)]
+        player = [player_combination[:, index] for index in range(8)]
+        conditions = [ai[self.CHESS_FIVE] > 0,
+                      player[self.CHESS_FIVE] > 0,
+                      ai[self.CHESS_LIVE_FOUR] + ai[self.CHESS_DEATH_FOUR] // 2 > 0,
+                      ai[self.CHESS_DEATH_FOUR] > 0,
+                      player[self.CHESS_LIVE_FOUR] + player[self.CHESS_DEATH_FOUR] // 2 > 0,
+                      (player[self.CHESS_DEATH_FOUR] > 0) & (player[self.CHESS_LIVE_THREE] > 0),
+                      (ai[self.CHESS_LIVE_THREE] > 0) & (player[self.CHESS_DEATH_FOUR] == 0),
+                      (player[self.CHESS_LIVE_THREE] > 1)
+                      & (ai[self.CHESS_LIVE_THREE] == 0)
+                      & (ai[self.CHESS_DEATH_THREE] == 0)]
+        weights = self.weights
+        ai_score = numpy.where(ai[self.CHESS_LIVE_THREE] > 1, weights['doubleLiveThree'],
+                               numpy.where(ai[self.CHESS_LIVE_THREE] > 0, weights['liveThree'], 0))
+        player_score = numpy.where(player[self.CHESS_DEATH_FOUR] > 0, weights['playerDeathFour'], 0)
+        player_score += numpy.where(player[self.CHESS_LIVE_THREE] > 1, weights['playerDoubleLiveThree'],
+                                    numpy.where(player[self.CHESS_LIVE_THREE] > 0, weights['playerLiveThree'], 0))
+        ai_score += ai[self.CHESS_DEATH_THREE] * weights['deathThree'] \
+            + ai[self.CHESS_LIVE_TWO] * weights['liveTwo'] + ai[self.CHESS_DEATH_TWO] * weights['deathTwo']
+        player_score += player[self.CHESS_DEATH_THREE] * weights['deathThree'] \
+            + player[self.CHESS_LIVE_TWO] * weights['liveTwo'] + player[self.CHESS_DEATH_TWO] * weights['deathTwo']
+        ai_score = numpy.select(conditions, [100000, 0, 9050, 9040, 0, 0, 9010, 0], ai_score)
+        player_score = numpy.select(conditions, [0, 100000, 0, 0, 9030, 9020, 0, 9000], player_score)
+        return ai_score, player_score
+
+    # return a score: aiScore - playerScore
+    def get_score(self, chessAI, chessPlayer):
+        chessCombination = self.chessCombination
+        ai_combination, player_combination = chessCombination[chessAI - 1], chessCombination[chessPlayer - 1]
+        ai_score, player_score = self.compute_score(ai_combination, player_combination)
+        score = ai_score - player_score
+        return score
+
+
+SearchResult = collections.namedtuple('SearchResult', ['x', 'y', 'score', 'depth', 'seconds', 'stats'])
+
+
+# display-free entry point: set up a position, search it and read the result
+class Engine:
+    def __init__(self, size=MP_SIZE, blackFirst=1, **options):  # options are passed on to GobangAI
+        self.chessBoard = BitChessBoard(size, blackFirst)
+        self.AI = GobangAI(self.chessBoard, **options)
+
+    # replace the game by moves played from an empty chessboard
+    def set_position(self, moves, blackFirst=None):
+        while len(self.chessBoard.chessList) > 0:
+            self.chessBoard.undo_chess()
+        if blackFirst is not None:
+            self.chessBoard.blackFirst = blackFirst
+        for x, y in moves:
+            self.play(x, y)
+
+    def play(self, x, y):
+        if not (0 <= x < self.chessBoard.size and 0 <= y < self.chessBoard.size) or self.chessBoard.board[x][y] != 0:
+            raise ValueError('illegal move: %d, %d' % (x, y))
+        self.chessBoard.put_chess(x, y)
+
+    def undo(self):
+        self.chessBoard.undo_chess()
+
+    def side_to_move(self):
+        if len(self.chessBoard.chessList) == 0:
+            return self.chessBoard.blackFirst
+        x, y = self.chessBoard.chessList[len(self.chessBoard.chessList) - 1]
+        return 3 - self.chessBoard.board[x][y]
+
+    # side with five in a row, or 0
+    def winner(self):
+        chessCombination = self.AI.compute_chess_combination(1, 2)
+        for chessType in (1, 2):
+            if chessCombination[chessType - 1][self.AI.CHESS_FIVE] > 0:
+                return chessType
+        return 0
+
+    # best move for the side to move
+    def search(self, depth=None, timeLimit=None):
+        if depth is None:
+            depth = SEARCH_DEPTH if timeLimit is None else MAX_SEARCH_DEPTH
+        startTime = time.time()
+        result = self.AI.take_ponder(depth, timeLimit)
+        if result is None:
+            result = self.AI.think(self.side_to_move(), depth, timeLimit)
+        score, x, y = result
+        return SearchResult(x, y, score, self.AI.finishedDepth, time.time() - startTime, self.AI.stats)
+
+    # search likely replies to the last move in the background, until the next search
+    def ponder(self, depth=SEARCH_DEPTH):
+        self.AI.start_ponder(3 - self.side_to_move(), depth)
+
+    def close(self):
+        self.AI.close()
@@ -0,0 +1,175 @@
+import sys
+import time
+
+import engine
+from engine import Engine, MAX_SIZE, TT_MEMORY, load_book, load_numpy
+
+ABOUT = 'name="Gobang", version="1.0", author="iABF", country="China"'
+TURN_TIMEOUT = 30000  # milliseconds per move until the manager sends INFO timeout_turn
+MATCH_MOVES = 25  # moves the time left in a match is shared among
+TIME_SHARE = 0.8  # part of the time for a move given to the search, the rest covers overshoot
+TIME_MARGIN = 0.05  # seconds kept for reading the command and writing the move
+BASE_MEMORY = 48 * 1024 * 1024  # bytes of the interpreter, numpy and the engine before any table is filled
+
+
+# Gomocup (Piskvork) protocol over stdin and stdout
+class Protocol:
+    def __init__(self, input, output):
+        self.input = input
+        self.output = output
+        self.engine = None
+        self.size = None
+        self.book = None
+        self.turnTimeout = TURN_TIMEOUT
+        self.matchTimeout = 0  # no match limit
+        self.timeLeft = None
+        self.memory = 0  # no memory limit
+        self.received = time.time()
+
+    def send(self, text):
+        self.output.write(text + '\n')
+        self.output.flush()
+
+    def run(self):
+        while True:
+            line = self.input.readline()
+            if line == '':
+                break
+            self.received = time.time()  # the move time counts from here
+            words = line.strip().split(' ', 1)
+            command = words[0].upper()
+            argument = words[1].strip() if len(words) > 1 else ''
+            if command == '':
+                continue
+            if command == 'END':
+                break
+            try:
+                self.dispatch(command, argument)
+            except ValueError as error:
+                self.send('ERROR %s' % error)
+        if self.engine is not None:
+            self.engine.close()
+
+    def dispatch(self, command, argument):
+        if command == 'START':
+            self.start(int(argument))
+        elif command == 'RESTART':
+            self.start(self.size)
+        elif command == 'INFO':
+            self.info(*argument.split(' ', 1))
+        elif command == 'BEGIN':
+            self.check_started()
+            self.move()
+        elif command == 'TURN':
+            self.check_started()
+            self.engine.play(*self.get_cell(argument))
+            self.move()
+        elif command == 'BOARD':
+            self.check_started()
+            self.board()
+            self.move()
+        elif command == 'TAKEBACK':
+            self.check_started()
+            self.takeback(self.get_cell(argument))
+        elif command == 'ABOUT':
+            self.send(ABOUT)
+        else:
+            self.send('UNKNOWN %s' % command)
+
+    def start(self, size):
+        if size is None or not 5 <= size <= MAX_SIZE:
+            raise ValueError('unsupported size')
+        self.size = size
+        self.new_engine([])
+        load_numpy()  # paid before the match clock runs
+        self.send('OK')
+
+    # a fresh Engine sized to the memory limit, with moves replayed on it
+    def new_engine(self, moves):
+        if self.engine is not None:
+            self.engine.close()
+        if self.book is None:
+            self.book = load_book()
+        ttMemory = TT_MEMORY
+        if self.memory > 0:
+            tables = max(self.memory - BASE_MEMORY, 0) // 2
+            engine.limit_tables(tables)
+            ttMemory = min(ttMemory, max(tables, 1024 * 1024))
+        self.engine = Engine(self.size, ttMemory=ttMemory, book=self.book)
+        self.engine.set_position(moves)
+
+    def info(self, key, value=''):
+        key = key.lower()
+        if key == 'timeout_turn':
+            self.turnTimeout = int(value)
+        elif key == 'timeout_match':
+            self.matchTimeout = int(value)
+        elif key == 'time_left':
+            self.timeLeft = int(value)
+        elif key == 'max_memory':
+            memory = int(value)
+            if memory != self.memory:
+                self.memory = memory
+                if self.engine is not None:
+                    self.new_engine(list(self.engine.chessBoard.chessList))
+        # rule, game_type, evaluate and folder don't change how the engine plays
+
+    def check_started(self):
+        if self.engine is None:
+            raise ValueError('no START yet')
+
+    def get_cell(self, text):
+        x, y = text.split(',')[:2]
+        return int(x), int(y)
+
+    # "x,y,field" lines until DONE, field 1 for own chess and 2 for the opponent's, then own move
+    def board(self):
+        own, opponent = [], []
+        while True:
+            line = self.input.readline()
+            if line == '' or line.strip().upper() == 'DONE':
+                break
+            x, y, field = [int(item) for item in line.strip().split(',')]
+            if field == 1:
+                own.append((x, y))
+            elif field == 2:
+                opponent.append((x, y))
+            else:
+                raise ValueError('unsupported field %d' % field)
+        self.received = time.time()
+        if len(opponent) - len(own) not in (0, 1):
+            raise ValueError('chess counts don\'t alternate')
+        first, second = (opponent, own) if len(opponent) > len(own) else (own, opponent)
+        moves = []
+        for index in range(len(first)):
+            moves.append(first[index])
+            if index < len(second):
+                moves.append(second[index])
+        self.engine.set_position(moves, 1)
+
+    def takeback(self, cell):
+        chessList = self.engine.chessBoard.chessList
+        if len(chessList) == 0 or tuple(chessList[len(chessList) - 1]) != cell:
+            raise ValueError('not the last move')
+        self.engine.undo()
+        self.send('OK')
+
+    # seconds the search may take for this move, from the turn and match limits
+    def get_time_limit(self):
+        limit = self.turnTimeout / 1000
+        if self.matchTimeout > 0 and self.timeLeft is not None:
+            limit = min(limit, self.timeLeft / 1000 / MATCH_MOVES)
+        return max(limit * TIME_SHARE - TIME_MARGIN - (time.time() - self.received), 0)
+
+    def move(self):
+        move = self.engine.AI.get_book_move(self.engine.side_to_move())
+        if move is None:
+            result = self.engine.search(timeLimit=self.get_time_limit())
+            move = result.x, result.y
+        x, y = move
+        self.engine.play(x, y)
+        self.send('%d,%d' % (x, y))
+
+
+if __name__ == '__main__':
+    Protocol(sys.stdin, sys.stdout).run()
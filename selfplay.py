@@ -0,0 +1,115 @@
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+from engine import Engine, GameWriter, MP_SIZE, PositionCache
+
+
+# "depth=2,time=0.5,liveTwo=8" -> search depth, time limit and score weights of one player
+def parse_config(text):
+    config = {'depth': None, 'time': None, 'weights': {}}
+    for item in text.split(','):
+        if item == '':
+            continue
+        name, value = item.split('=')
+        if name == 'depth':
+            config['depth'] = int(value)
+        elif name == 'time':
+            config['time'] = float(value)
+        else:
+            config['weights'][name] = int(value)
+    return config
+
+
+# play one game; player A is black in even games, the opening chess are put near the center at random
+def play_game(job):
+    index, configs, seed, size, maxMoves, opening, cachePath = job
+    rand = random.Random(seed)
+    names = ['A', 'B'] if index % 2 == 0 else ['B', 'A']  # black, white
+    caches = {name: None if cachePath is None else PositionCache('%s.%s' % (cachePath, name)) for name in names}
+    engines = [Engine(size, weights=configs[name]['weights'], cache=caches[name]) for name in names]
+    seconds = {'A': 0.0, 'B': 0.0}
+    moves = {'A': 0, 'B': 0}
+    center = [(x, y) for x in range(size // 2 - 1, size // 2 + 2) for y in range(size // 2 - 1, size // 2 + 2)]
+    rand.shuffle(center)
+    winner = None
+    for turn in range(min(maxMoves, size * size)):
+        name = names[turn % 2]
+        if turn < opening:
+            x, y = center[turn]
+        else:
+            startTime = time.time()
+            result = engines[turn % 2].search(configs[name]['depth'], configs[name]['time'])
+            seconds[name] += time.time() - startTime
+            moves[name] += 1
+            x, y = result.x, result.y
+        for engine in engines:
+            engine.play(x, y)
+        if engines[0].winner() != 0:
+            winner = name
+            break
+    chessList = list(engines[0].chessBoard.chessList)
+    for engine in engines:
+        engine.close()
+    for cache in caches.values():
+        if cache is not None:
+            cache.close()
+    return {'game': index, 'black': names[0], 'winner': winner, 'moves': turn + 1,
+            'seconds': seconds, 'searches': moves, 'chessList': chessList}
+
+
+# score of A with a 95% confidence interval, counting a draw as half a win
+def confidence_interval(wins, draws, losses):
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    margin = 1.96 * math.sqrt(variance / games)
+    return score, max(score - margin, 0), min(score + margin, 1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Headless GobangAI self-play')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--a', default='', help='player A, e.g. "depth=3" or "time=0.5,liveTwo=8"')
+    parser.add_argument('--b', default='', help='player B, same format as --a')
+    parser.add_argument('--size', type=int, default=MP_SIZE)
+    parser.add_argument('--max-moves', type=int, default=MP_SIZE * MP_SIZE)
+    parser.add_argument('--opening', type=int, default=2, help='random chess put near the center first')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--cache', help='keep deep search results in PATH.A and PATH.B across games and runs')
+    parser.add_argument('--record', help='append every game to this game record file')
+    args = parser.parse_args()
+    configs = {'A': parse_config(args.a), 'B': parse_config(args.b)}
+    jobs = [(index, configs, args.seed * 1000003 + index, args.size, args.max_moves, min(max(args.opening, 1), 9),
+             args.cache)
+            for index in range(args.games)]
+    counts = {'A': 0, 'B': 0, None: 0}
+    seconds = {'A': 0.0, 'B': 0.0}
+    searches = {'A': 0, 'B': 0}
+    writer = None if args.record is None else GameWriter(args.record)
+    startTime = time.time()
+    with multiprocessing.Pool(args.workers) as pool:
+        for result in pool.imap_unordered(play_game, jobs):  # printed as games finish
+            counts[result['winner']] += 1
+            if writer is not None:
+                winner = 0 if result['winner'] is None else 1 if result['winner'] == result['black'] else 2
+                writer.write(args.size, 1, result['chessList'], winner)
+            for name in ('A', 'B'):
+                seconds[name] += result['seconds'][name]
+                searches[name] += result['searches'][name]
+            print('game %d: %s (A plays %s) in %d moves' %
+                  (result['game'], 'draw' if result['winner'] is None else result['winner'] + ' wins',
+                   'black' if result['black'] == 'A' else 'white', result['moves']), flush=True)
+    elapsed = time.time() - startTime
+    if writer is not None:
+        writer.close()
+    score, low, high = confidence_interval(counts['A'], counts[None], counts['B'])
+    print('A: %d wins, %d draws, %d losses' % (counts['A'], counts[None], counts['B']))
+    print('A score: %.3f (95%% CI %.3f - %.3f)' % (score, low, high))
+    print('%.2f games/s, %.1f s total' % (args.games / elapsed, elapsed))
+    for name in ('A', 'B'):
+        if searches[name] > 0:
+            print('%s: %.3f s per move' % (name, seconds[name] / searches[name]))
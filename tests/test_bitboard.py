@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from engine import BitChessBoard, ChessBoard, GobangAI
+
+
+def assert_same_board(chessBoard, bitBoard):
+    assert chessBoard.board == bitBoard.board
+    for lineId in range(len(chessBoard.lines)):
+        assert chessBoard.get_line(lineId) == bitBoard.get_line(lineId)
+        assert chessBoard.get_line_key(lineId) == bitBoard.get_line_key(lineId)
+    assert chessBoard.hash == bitBoard.hash
+    assert chessBoard.hashes == bitBoard.hashes
+    assert chessBoard.candidates == bitBoard.candidates
+
+
+# random chess put and taken back on both backends at once
+@pytest.mark.parametrize('size', [15, 19])
+def test_play_and_undo(size):
+    rand = random.Random(size)
+    chessBoard, bitBoard = ChessBoard(size), BitChessBoard(size)
+    for step in range(300):
+        empty = [(x, y) for x in range(size) for y in range(size) if chessBoard.board[x][y] == 0]
+        if len(chessBoard.chessList) > 0 and (rand.random() < 0.3 or len(empty) == 0):
+            chessBoard.undo_chess()
+            bitBoard.undo_chess()
+        else:
+            x, y = rand.choice(empty)
+            chessBoard.put_chess(x, y)
+            bitBoard.put_chess(x, y)
+        assert_same_board(chessBoard, bitBoard)
+
+
+def test_think():
+    rand = random.Random(4)
+    for position in range(8):
+        chessBoard, bitBoard = ChessBoard(15), BitChessBoard(15)
+        cells = rand.sample([(x, y) for x in range(5, 10) for y in range(5, 10)], rand.randint(2, 12))
+        for x, y in cells:
+            chessBoard.put_chess(x, y)
+            bitBoard.put_chess(x, y)
+        chessType = 3 - chessBoard.board[cells[-1][0]][cells[-1][1]]
+        results = [GobangAI(board, ttMemory=1 << 20, threats=False).think(chessType, 2)
+                   for board in (chessBoard, bitBoard)]
+        assert results[0] == results[1]
+        assert_same_board(chessBoard, bitBoard)  # the search left both as they were
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from engine import ChessBoard, Engine, GobangAI, MAX_SEARCH_DEPTH
+
+
+def test_search_empty_board():
+    engine = Engine(15)
+    result = engine.search(depth=2)
+    assert (result.x, result.y) == (7, 7)
+    engine.close()
+
+
+def test_search_full_board():
+    engine = Engine(5)
+    engine.set_position([(3, 2), (3, 1), (2, 4), (4, 2), (1, 2), (0, 3), (4, 3), (0, 0), (0, 2), (3, 0), (2, 3), (4, 4),
+                         (4, 0), (3, 4), (1, 0), (2, 2), (3, 3), (1, 1), (2, 0), (0, 1), (1, 4), (4, 1), (2, 1), (0, 4),
+                         (1, 3)])
+    assert engine.winner() == 0
+    with pytest.raises(ValueError):
+        engine.search(depth=2)
+    engine.close()
+
+
+# white has a forced win by fours, so black must keep to the moves the threat solver leaves, helpers included
+def test_helpers_keep_to_defenses():
+    chessBoard = ChessBoard(15)
+    chessBoard.replay([(6, 8), (7, 4), (10, 6), (9, 5), (4, 9), (5, 4), (4, 4), (9, 10), (6, 4), (7, 7), (8, 4),
+                       (8, 7), (8, 9), (6, 9), (9, 8), (7, 6)])
+    AI = GobangAI(chessBoard, ttMemory=1 << 20, workers=2)
+    AI.threatSolver.timeLimit, AI.threatSolver.maxNodes = 30, 1 << 20  # proven in full, then kept in its cache
+    try:
+        assert AI.solve_threats(1) is None and AI.rootMoves == {(7, 5)}
+        AI.helpers.start(AI, 1, 3, None)
+        time.sleep(1)  # finish() stops the helpers at once
+        reports = AI.helpers.finish()
+        assert len(reports) > 0
+        for depth, score, position in reports:
+            assert position == (7, 5)
+        score, x, y = AI.think(1, MAX_SEARCH_DEPTH, 1)
+        assert (x, y) == (7, 5)
+    finally:
+        AI.close()
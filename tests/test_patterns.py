@@ -0,0 +1,536 @@
+import random
+
+import pytest
+
+from engine import BitChessBoard, ChessBoard, GobangAI
+
+
+# the whole-board classifier the line tables were generated from, kept as the reference they must agree with
+class ReferenceAI:
+    def __init__(self, chessBoard):
+        self.chessBoard = chessBoard
+        self.vis = [[[False, False, False, False]
+                     for x in range(chessBoard.size)]
+                    for y in range(chessBoard.size)]  # whether visited before
+        self.isDoubleTwo = [[[[False,  # **A**
+                               False,  # *A*
+                               False,  # *AA*
+                               False]  # *-A-*
+                              for direction in range(4)]
+                             for x in range(chessBoard.size)]
+                            for y in range(chessBoard.size)]
+        self.CHESS_FIVE = 1
+        self.CHESS_LIVE_FOUR = 2
+        self.CHESS_DEATH_FOUR = 3
+        self.CHESS_LIVE_THREE = 4
+        self.CHESS_DEATH_THREE = 5
+        self.CHESS_LIVE_TWO = 6
+        self.CHESS_DEATH_TWO = 7
+        self.dir = [(0, 1), (1, -1), (1, 0), (1, 1)]
+
+    def clear_flags(self):
+        for x in range(self.chessBoard.size):
+            for y in range(self.chessBoard.size):
+                for direction in range(4):
+                    self.vis[x][y][direction] = False
+                    for chessType in range(4):
+                        self.isDoubleTwo[x][y][direction][chessType] = False
+
+    # each side starts from clear flags, as the line tables do: the original pre_get_score kept the vis[x][y]
+    # marks left by the chessAI pass, so the chessPlayer pass skipped every direction and counted nothing
+    def pre_get_score(self, x, y, chessAI, chessPlayer):
+        chessCombination = [[0 for x in range(8)] for y in range(2)]
+        for chessType, otherType in ((chessAI, chessPlayer), (chessPlayer, chessAI)):
+            self.clear_flags()
+            self.chessBoard.board[x][y] = chessType
+            self.compute_one_side_combination(chessType, otherType, chessCombination, x, y)
+        self.chessBoard.board[x][y] = 0
+        return self.compute_score(chessCombination[chessAI - 1], chessCombination[chessPlayer - 1])
+
+    def compute_chess_combination(self, chessAI, chessPlayer):
+        chessCombination = [[0 for x in range(8)] for y in range(2)]
+        self.clear_flags()
+        for x in range(self.chessBoard.size):
+            for y in range(self.chessBoard.size):
+                if self.chessBoard.board[x][y] == chessAI:
+                    self.compute_one_side_combination(chessAI, chessPlayer, chessCombination, x, y)
+                elif self.chessBoard.board[x][y] == chessPlayer:
+                    self.compute_one_side_combination(chessPlayer, chessAI, chessCombination, x, y)
+        return chessCombination
+
+    def compute_one_side_combination(self, chessAI, chessPlayer, chessCombination, x, y):
+        def inside_board(xx, yy):
+            return 0 <= xx < self.chessBoard.size and 0 <= yy < self.chessBoard.size
+
+        def is_ai(xx, yy):
+            return self.chessBoard.board[xx][yy] == chessAI
+
+        def is_player(xx, yy):
+            return self.chessBoard.board[xx][yy] == chessPlayer
+
+        def is_empty(xx, yy):
+            return self.chessBoard.board[xx][yy] == 0
+
+        def add_live_four():
+            chessCombination[chessAI - 1][self.CHESS_LIVE_FOUR] += 1
+
+        def add_death_four():
+            chessCombination[chessAI - 1][self.CHESS_DEATH_FOUR] += 1
+
+        def add_live_three():
+            chessCombination[chessAI - 1][self.CHESS_LIVE_THREE] += 1
+
+        def add_death_three():
+            chessCombination[chessAI - 1][self.CHESS_DEATH_THREE] += 1
+
+        def add_live_two():
+            chessCombination[chessAI - 1][self.CHESS_LIVE_TWO] += 1
+
+        def add_death_two():
+            chessCombination[chessAI - 1][self.CHESS_DEATH_TWO] += 1
+
+        def add_five():
+            chessCombination[chessAI - 1][self.CHESS_FIVE] += 1
+
+        for index, (dir_x, dir_y) in enumerate(self.dir):
+            if self.vis[x][y][index]:
+                continue
+            self.vis[x][y][index] = True
+            count, l_max, r_max, enemy = 1, 0, 0, 0
+            l_death, r_death = False, False
+            for i in range(1, 5):
+                next_x = x + dir_x * i
+                next_y = y + dir_y * i
+                if inside_board(next_x, next_y):
+                    if is_ai(next_x, next_y):
+                        count += 1
+                        l_max = i
+                        self.vis[next_x][next_y][index] = True
+                    else:
+                        if is_player(next_x, next_y):
+                            enemy += 1
+                            l_death = True
+                        break
+                else:
+                    enemy += 1
+                    l_death = True
+                    break
+            for i in range(1, 5):
+                next_x = x - dir_x * i
+                next_y = y - dir_y * i
+                if inside_board(next_x, next_y):
+                    if is_ai(next_x, next_y):
+                        count += 1
+                        r_max = i
+                        self.vis[next_x][next_y][index] = True
+                    else:
+                        if is_player(next_x, next_y):
+                            enemy += 1
+                            r_death = True
+                        break
+                else:
+                    enemy += 1
+                    r_death = True
+                    break
+            if count >= 5:  # *****
+                add_five()
+            elif enemy == 2:  # Since then, only one or zero enemies left
+                continue
+            elif count == 4:
+                if enemy == 0:  # -****-
+                    add_live_four()
+                else:  # -****^
+                    add_death_four()
+            elif count == 3:
+                if enemy == 0:
+                    next_x = x + dir_x * (l_max + 2)
+                    next_y = y + dir_y * (l_max + 2)
+                    enemy_far = 0
+                    if inside_board(next_x, next_y):
+                        if is_ai(next_x, next_y):  # *-***-
+                            add_death_four()
+                        elif is_player(next_x, next_y):  # ^-***-
+                            enemy_far += 1
+                    else:  # ^-***-
+                        enemy_far += 1
+                    next_x = x - dir_x * (r_max + 2)
+                    next_y = y - dir_y * (r_max + 2)
+                    if inside_board(next_x, next_y):
+                        if is_ai(next_x, next_y):  # -***-*
+                            add_death_four()
+                        elif is_player(next_x, next_y):  # -***-^
+                            enemy_far += 1
+                    else:  # -***-^
+                        enemy_far += 1
+                    if enemy_far == 2:  # ^-***-^
+                        add_death_three()
+                    else:  # -***-
+                        add_live_three()
+                else:  # enemy is 1
+                    if l_death:  # ^***-
+                        next_x = x - dir_x * (r_max + 2)
+                        next_y = y - dir_y * (r_max + 2)
+                        if inside_board(next_x, next_y):
+                            if is_ai(next_x, next_y):  # ^***-*
+                                add_death_four()
+                            elif is_empty(next_x, next_y):  # ^***--
+                                add_death_three()
+                    elif r_death:  # -***^
+                        next_x = x + dir_x * (l_max + 2)
+                        next_y = y + dir_y * (l_max + 2)
+                        if inside_board(next_x, next_y):
+                            if is_ai(next_x, next_y):  # *-***^
+                                add_death_four()
+                            elif is_empty(next_x, next_y):  # --***^
+                                add_death_three()
+            elif count == 2:
+                if enemy == 0:  # -**-
+                    enemy_far = 0
+                    empty = 0
+                    next_x = x + dir_x * (l_max + 2)
+                    next_y = y + dir_y * (l_max + 2)
+                    if inside_board(next_x, next_y):
+                        if is_ai(next_x, next_y):  # ?*-**-
+                            next_xx = x + dir_x * (l_max + 3)
+                            next_yy = y + dir_y * (l_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # **-**-
+                                    if not self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][0]:
+                                        add_death_four()
+                                        self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][0] = True
+                                elif is_player(next_xx, next_yy):  # ^*-**-
+                                    add_death_three()
+                                else:  # -*-**-
+                                    add_live_three()
+                            else:  # ^*-**-
+                                add_death_three()
+                        elif is_player(next_x, next_y):  # ^-**-
+                            enemy_far += 1
+                        else:  # ?--**-
+                            next_xx = x + dir_x * (l_max + 3)
+                            next_yy = y + dir_y * (l_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # *--**-
+                                    add_death_three()
+                                else:
+                                    empty += 1
+                            else:
+                                empty += 1
+                    else:  # ^-**-
+                        enemy_far += 1
+                    next_x = x - dir_x * (r_max + 2)
+                    next_y = y - dir_y * (r_max + 2)
+                    if inside_board(next_x, next_y):
+                        if is_ai(next_x, next_y):  # -**-*?
+                            next_xx = x - dir_x * (r_max + 3)
+                            next_yy = y - dir_y * (r_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # -**-**
+                                    if not self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][0]:
+                                        add_death_four()
+                                        self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][0] = True
+                                elif is_player(next_xx, next_yy):  # -**-*^
+                                    add_death_three()
+                                else:  # -**-*-
+                                    add_live_three()
+                            else:  # -**-*^
+                                add_death_three()
+                        elif is_player(next_x, next_y):  # -**-^
+                            enemy_far += 1
+                        else:  # -**--?
+                            next_xx = x - dir_x * (r_max + 3)
+                            next_yy = y - dir_y * (r_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # -**--*
+                                    add_death_three()
+                                else:
+                                    empty += 1
+                            else:
+                                empty += 1
+                    else:  # -**-^
+                        enemy_far += 1
+                    if enemy_far == 2:  # ^-**-^
+                        continue
+                    elif empty == 2:  # n--**--n
+                        add_live_two()
+                else:
+                    if l_death:  # ^**-
+                        next_x = x - dir_x * (r_max + 2)
+                        next_y = y - dir_y * (r_max + 2)
+                        if inside_board(next_x, next_y):
+                            if is_ai(next_x, next_y):  # ^**-*?
+                                next_xx = x - dir_x * (r_max + 3)
+                                next_yy = y - dir_y * (r_max + 3)
+                                if inside_board(next_xx, next_yy):
+                                    if is_ai(next_xx, next_yy):  # ^**-**
+                                        if not self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][0]:
+                                            add_death_four()
+                                            self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][0] = True
+                                    elif is_player(next_xx, next_yy):  # ^**-*^
+                                        continue
+                                    else:  # ^**-*-
+                                        add_death_three()
+                                else:  # ^**-*^
+                                    continue
+                            elif is_player(next_x, next_y):  # ^**-^
+                                continue
+                            else:  # ^**--?
+                                next_xx = x - dir_x * (r_max + 3)
+                                next_yy = y - dir_y * (r_max + 3)
+                                if inside_board(next_xx, next_yy):
+                                    if is_ai(next_xx, next_yy):  # ^**--*
+                                        add_death_three()
+                                    elif is_player(next_xx, next_yy):  # ^**--^
+                                        continue
+                                    else:  # ^**---
+                                        add_death_two()
+                                else:  # ^**--^
+                                    continue
+                        else:  # ^**-^
+                            continue
+                    elif r_death:  # ?-**^
+                        next_x = x + dir_x * (l_max + 2)
+                        next_y = y + dir_y * (l_max + 2)
+                        if inside_board(next_x, next_y):
+                            if is_ai(next_x, next_y):  # ?*-**^
+                                next_xx = x + dir_x * (l_max + 3)
+                                next_yy = y + dir_y * (l_max + 3)
+                                if inside_board(next_xx, next_yy):
+                                    if is_ai(next_xx, next_yy):  # **-**^
+                                        if not self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][0]:
+                                            add_death_four()
+                                            self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][0] = True
+                                    elif is_player(next_xx, next_yy):  # ^*-**^
+                                        continue
+                                    else:  # -*-**^
+                                        add_death_three()
+                                else:  # ^*-**^
+                                    continue
+                            elif is_player(next_x, next_y):  # ^-**^
+                                continue
+                            else:  # ?--**^
+                                next_xx = x - dir_x * (r_max + 3)
+                                next_yy = y - dir_y * (r_max + 3)
+                                if inside_board(next_xx, next_yy):
+                                    if is_ai(next_xx, next_yy):  # *--**^
+                                        add_death_three()
+                                    elif is_player(next_xx, next_yy):  # ^--**^
+                                        continue
+                                    else:  # ---**^
+                                        add_death_two()
+                                else:  # ^--**^
+                                    continue
+                        else:  # ^-**^
+                            continue
+            elif count == 1:
+                if enemy == 0:  # -*-
+                    next_x = x + dir_x * (l_max + 2)
+                    next_y = y + dir_y * (l_max + 2)
+                    if inside_board(next_x, next_y):
+                        if is_ai(next_x, next_y):  # ?*-*-
+                            next_xx = x + dir_x * (l_max + 3)
+                            next_yy = y + dir_y * (l_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_empty(next_xx, next_yy):  # -*-*-
+                                    if not self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][1]:
+                                        self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][1] = True
+                                        add_live_two()
+                            next_xx = x - dir_x * (r_max + 2)
+                            next_yy = y - dir_y * (r_max + 2)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # *-*-*
+                                    add_death_three()
+                        elif is_empty(next_x, next_y):  # ?--*-
+                            next_xx = x + dir_x * (l_max + 3)
+                            next_yy = y + dir_y * (l_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # ?*--*-
+                                    next_xxx = x + dir_x * (l_max + 4)
+                                    next_yyy = y + dir_y * (l_max + 4)
+                                    if inside_board(next_xxx, next_yyy) and is_empty(next_xxx,
+                                                                                     next_yyy):  # -*--*-
+                                        if not self.isDoubleTwo[next_x][next_y][index][2]:
+                                            self.isDoubleTwo[next_x][next_y][index][2] = True
+                                            self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][2] = True
+                                            add_live_two()
+                                elif is_empty(next_xx, next_yy):  # ?---*-
+                                    next_xxx = x + dir_x * (l_max + 4)
+                                    next_yyy = y + dir_y * (l_max + 4)
+                                    if inside_board(next_xxx, next_yyy):
+                                        if is_ai(next_xxx, next_yyy):  # *---*-
+                                            if not self.isDoubleTwo[next_x][next_y][index][3]:
+                                                self.isDoubleTwo[next_x][next_y][index][3] = True
+                                                add_death_two()
+                    next_x = x - dir_x * (r_max + 2)
+                    next_y = y - dir_y * (r_max + 2)
+                    if inside_board(next_x, next_y):
+                        if is_ai(next_x, next_y):  # -*-*?
+                            next_xx = x - dir_x * (r_max + 3)
+                            next_yy = y - dir_y * (r_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_empty(next_xx, next_yy):  # -*-*-
+                                    if not self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][1]:
+                                        self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][1] = True
+                                        add_live_two()
+                        elif is_empty(next_x, next_y):  # -*--?
+                            next_xx = x - dir_x * (r_max + 3)
+                            next_yy = y - dir_y * (r_max + 3)
+                            if inside_board(next_xx, next_yy):
+                                if is_ai(next_xx, next_yy):  # -*--*?
+                                    next_xxx = x - dir_x * (r_max + 4)
+                                    next_yyy = y - dir_y * (r_max + 4)
+                                    if inside_board(next_xxx, next_yyy) and is_empty(next_xxx,
+                                                                                     next_yyy):  # -*--*-
+                                        if not self.isDoubleTwo[next_x][next_y][index][2]:
+                                            self.isDoubleTwo[next_x][next_y][index][2] = True
+                                            self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][2] = True
+                                            add_live_two()
+                                elif is_empty(next_xx, next_yy):  # -*---?
+                                    next_xxx = x - dir_x * (r_max + 4)
+                                    next_yyy = y - dir_y * (r_max + 4)
+                                    if inside_board(next_xxx, next_yyy):
+                                        if is_ai(next_xxx, next_yyy):  # -*---*
+                                            if not self.isDoubleTwo[next_x][next_y][index][3]:
+                                                self.isDoubleTwo[next_x][next_y][index][3] = True
+                                                add_death_two()
+                else:
+                    if l_death:  # ^*-?
+                        next_x = x - dir_x * (r_max + 2)
+                        next_y = y - dir_y * (r_max + 2)
+                        next_xx = x - dir_x * (r_max + 3)
+                        next_yy = y - dir_y * (r_max + 3)
+                        next_xxx = x - dir_x * (r_max + 4)
+                        next_yyy = y - dir_y * (r_max + 4)
+                        if inside_board(next_xxx, next_yyy):
+                            if is_ai(next_x, next_y) \
+                                    and is_empty(next_xx, next_yy) \
+                                    and is_empty(next_xxx, next_yyy):  # ^*-*--
+                                if not self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][1]:
+                                    self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][1] = True
+                                    add_death_two()
+                            elif is_empty(next_x, next_y) \
+                                    and is_ai(next_xx, next_yy) \
+                                    and is_empty(next_xxx, next_yyy):  # ^*--*-
+                                if not self.isDoubleTwo[next_x][next_y][index][2]:
+                                    self.isDoubleTwo[next_x][next_y][index][2] = True
+                                    self.isDoubleTwo[next_x + dir_x][next_y + dir_y][index][2] = True
+                                    add_death_two()
+                            elif is_empty(next_x, next_y) \
+                                    and is_empty(next_xx, next_yy) \
+                                    and is_ai(next_xxx, next_yyy):  # ^*---*
+                                if not self.isDoubleTwo[next_x][next_y][index][3]:
+                                    self.isDoubleTwo[next_x][next_y][index][3] = True
+                                    add_death_two()
+                    elif r_death:  # ?-*^
+                        next_x = x + dir_x * (l_max + 2)
+                        next_y = y + dir_y * (l_max + 2)
+                        next_xx = x + dir_x * (l_max + 3)
+                        next_yy = y + dir_y * (l_max + 3)
+                        next_xxx = x + dir_x * (l_max + 4)
+                        next_yyy = y + dir_y * (l_max + 4)
+                        if inside_board(next_xxx, next_yyy):
+                            if is_ai(next_x, next_y) \
+                                    and is_empty(next_xx, next_yy) \
+                                    and is_empty(next_xxx, next_yyy):  # --*-*^
+                                if not self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][1]:
+                                    self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][1] = True
+                                    add_death_two()
+                            elif is_empty(next_x, next_y) \
+                                    and is_ai(next_xx, next_yy) \
+                                    and is_empty(next_xxx, next_yyy):  # -*--*^
+                                if not self.isDoubleTwo[next_x][next_y][index][2]:
+                                    self.isDoubleTwo[next_x][next_y][index][2] = True
+                                    self.isDoubleTwo[next_x - dir_x][next_y - dir_y][index][2] = True
+                                    add_death_two()
+                            elif is_empty(next_x, next_y) \
+                                    and is_empty(next_xx, next_yy) \
+                                    and is_ai(next_xxx, next_yyy):  # *---*^
+                                if not self.isDoubleTwo[next_x][next_y][index][3]:
+                                    self.isDoubleTwo[next_x][next_y][index][3] = True
+                                    add_death_two()
+
+    def compute_score(self, ai_combination, player_combination):
+        ai_score, player_score = 0, 0
+        if ai_combination[self.CHESS_FIVE] > 0:
+            return 100000, 0
+        if player_combination[self.CHESS_FIVE] > 0:
+            return 0, 100000
+        if ai_combination[self.CHESS_LIVE_FOUR] + ai_combination[self.CHESS_DEATH_FOUR] // 2 > 0:
+            return 9050, 0
+        if ai_combination[self.CHESS_DEATH_FOUR] > 0:
+            return 9040, 0
+        if player_combination[self.CHESS_LIVE_FOUR] + player_combination[self.CHESS_DEATH_FOUR] // 2 > 0:
+            return 0, 9030
+        if player_combination[self.CHESS_DEATH_FOUR] > 0 and player_combination[self.CHESS_LIVE_THREE] > 0:
+            return 0, 9020
+        if ai_combination[self.CHESS_LIVE_THREE] > 0 and player_combination[self.CHESS_DEATH_FOUR] == 0:
+            return 9010, 0
+        if player_combination[self.CHESS_LIVE_THREE] > 1 \
+                and ai_combination[self.CHESS_LIVE_THREE] == 0 \
+                and ai_combination[self.CHESS_DEATH_THREE] == 0:
+            return 0, 9000
+
+        if player_combination[self.CHESS_DEATH_FOUR] > 0:
+            player_score += 400
+
+        if ai_combination[self.CHESS_LIVE_THREE] > 1:
+            ai_score += 500
+        elif ai_combination[self.CHESS_LIVE_THREE] > 0:
+            ai_score += 100
+
+        if player_combination[self.CHESS_LIVE_THREE] > 1:
+            player_score += 2000
+        elif player_combination[self.CHESS_LIVE_THREE] > 0:
+            player_score += 400
+
+        ai_score += ai_combination[self.CHESS_DEATH_THREE] * 10
+        player_score += player_combination[self.CHESS_DEATH_THREE] * 10
+        ai_score += ai_combination[self.CHESS_LIVE_TWO] * 6
+        player_score += player_combination[self.CHESS_LIVE_TWO] * 6
+        ai_score += ai_combination[self.CHESS_DEATH_TWO] * 2
+        player_score += player_combination[self.CHESS_DEATH_TWO] * 2
+
+        return ai_score, player_score
+
+    def get_score(self, chessAI, chessPlayer):
+        chessCombination = self.compute_chess_combination(chessAI, chessPlayer)
+        aiScore, playerScore = self.compute_score(chessCombination[chessAI - 1], chessCombination[chessPlayer - 1])
+        return aiScore - playerScore
+
+
+# positions of random chess around the center, crowded enough for every kind of pattern to turn up
+def random_positions(boardType, size, count, seed):
+    rand = random.Random(seed)
+    for position in range(count):
+        chessBoard = boardType(size)
+        span = rand.randint(3, size // 2)
+        low, high = size // 2 - span, size // 2 + span
+        cells = [(x, y) for x in range(max(low, 0), min(high, size - 1) + 1)
+                 for y in range(max(low, 0), min(high, size - 1) + 1)]
+        for x, y in rand.sample(cells, rand.randint(1, len(cells) * 3 // 4)):
+            chessBoard.put_chess(x, y)
+        yield chessBoard
+
+
+@pytest.mark.parametrize('boardType', [ChessBoard, BitChessBoard])
+@pytest.mark.parametrize('size', [15, 9])
+def test_chess_combination(boardType, size):
+    for chessBoard in random_positions(boardType, size, 40, size):
+        AI, reference = GobangAI(chessBoard, ttMemory=1, threats=False), ReferenceAI(chessBoard)
+        for chessAI in (1, 2):
+            expected = reference.compute_chess_combination(chessAI, 3 - chessAI)
+            assert AI.compute_chess_combination(chessAI, 3 - chessAI) == expected
+            assert AI.get_score(chessAI, 3 - chessAI) == reference.get_score(chessAI, 3 - chessAI)
+
+
+@pytest.mark.parametrize('boardType', [ChessBoard, BitChessBoard])
+def test_pre_get_score(boardType):
+    for chessBoard in random_positions(boardType, 15, 20, 5):
+        AI, reference = GobangAI(chessBoard, ttMemory=1, threats=False), ReferenceAI(chessBoard)
+        AI.compute_chess_combination(1, 2)
+        for x in range(chessBoard.size):
+            for y in range(chessBoard.size):
+                if chessBoard.board[x][y] == 0:
+                    for chessAI in (1, 2):
+                        expected = reference.pre_get_score(x, y, chessAI, 3 - chessAI)
+                        assert AI.pre_get_score(x, y, chessAI, 3 - chessAI) == expected